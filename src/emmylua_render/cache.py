@@ -0,0 +1,27 @@
+"""
+Location of persistent caches that speed up repeated runs.
+"""
+
+import os
+from pathlib import Path
+
+
+def cache_dir(*sub: str) -> Path:
+    """
+    Get the user cache directory for emmylua-render, respecting ``$XDG_CACHE_HOME``.
+    It is created if it does not exist. Callers should treat failures to
+    read from or write to it as cache misses.
+
+    Args:
+        sub: Optional path components of a subdirectory to return instead
+
+    Returns:
+        Path to the cache directory
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    path = Path(base, "emmylua-render", *sub)
+    try:
+        path.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        pass
+    return path
@@ -4,36 +4,74 @@ Uses emmylua_doc_cli output to generate documentation from Jinja templates.
 """
 
 import argparse
-import hashlib
+import json
 import logging
 import os
 import shutil
 import subprocess
 import sys
+import tempfile
+from functools import partial
 from pathlib import Path
 
-from lark import Lark
-from lark import logger as lark_logger
-
-from emmylua_render.raw_models import Index
-from emmylua_render.render import Doc
-from emmylua_render.type_parser import TYPE_GRAMMAR, TreeHydrator
-
-from .jinja import render_template
+from emmylua_render.cache import cache_dir
 
 
 def get_vimruntime() -> str:
-    return subprocess.run(
-        ["nvim", "-es", "+put=$VIMRUNTIME|print|quit!"],
+    """
+    Get ``$VIMRUNTIME`` of the ``nvim`` in ``$PATH``.
+    Querying it means starting Neovim, so the result is cached
+    across runs, keyed on the path and modification time of the binary
+    and on ``$VIMRUNTIME``/``$VIM``, which override the computed value.
+
+    Returns:
+        Output of printing ``$VIMRUNTIME`` in nvim
+    """
+    nvim = shutil.which("nvim") or "nvim"
+    try:
+        key = json.dumps(
+            [
+                nvim,
+                os.stat(nvim).st_mtime_ns,
+                os.environ.get("VIMRUNTIME"),
+                os.environ.get("VIM"),
+            ]
+        )
+    except OSError:
+        key = None
+    cache_file = cache_dir() / "vimruntime.json"
+    if key is not None:
+        try:
+            cached = json.loads(cache_file.read_bytes())
+            if cached.get("key") == key:
+                return cached["vimruntime"]
+        except (OSError, ValueError, AttributeError, KeyError):
+            # Missing or corrupt (JSONDecodeError is a ValueError), treat as a miss
+            pass
+    vimruntime = subprocess.run(
+        [nvim, "-es", "+put=$VIMRUNTIME|print|quit!"],
         capture_output=True,
         check=True,
         encoding="utf8",
     ).stdout
+    if key is not None:
+        # Write atomically, concurrent runs must not see a truncated file
+        try:
+            fd, tmp = tempfile.mkstemp(dir=cache_file.parent, suffix=".tmp")
+        except OSError:
+            pass
+        else:
+            try:
+                with os.fdopen(fd, "w") as f:
+                    f.write(json.dumps({"key": key, "vimruntime": vimruntime}))
+                os.replace(tmp, cache_file)
+            except OSError:
+                Path(tmp).unlink(missing_ok=True)
+    return vimruntime
 
 
-def get_doc_data(project_root: Path, env_override: dict[str, str]) -> str:
-    base_env = os.environ.copy()
-    env = base_env | {"VIMRUNTIME": get_vimruntime()} | env_override
+def get_doc_data(project_root: Path, env_override: dict[str, str]) -> bytes:
+    env = {**os.environ, "VIMRUNTIME": get_vimruntime(), **env_override}
     rel_pp = project_root.relative_to(Path(".").resolve())
     # Limit doc output for performance and to avoid rendering unrelated types
     includes = ",".join(
@@ -252,8 +290,11 @@ def validate_args(args: argparse.Namespace) -> tuple[bool, str]:
 
     if args.project_name is None:
         try:
-            args.project_name = next(iter(sorted(next(args.project_root.walk())[1])))
-        except StopIteration:
+            with os.scandir(args.project_root) as entries:
+                args.project_name = min(
+                    e.name for e in entries if e.is_dir(follow_symlinks=False)
+                )
+        except ValueError:
             return (
                 False,
                 f"No directory in project-root to derive project name from: {args.project_root}",
@@ -317,25 +358,32 @@ def main() -> int:
         return 1
     env_vars = process_env_vars(args.env)
 
+    # Defer heavy imports until we know we're going to render something.
+    # Keeps --help/--version and invalid invocations snappy.
+    from lark import logger as lark_logger
+
+    from emmylua_render.raw_models import Index
+    from emmylua_render.render import Doc
+    from emmylua_render.type_parser import build_parser
+
+    from .jinja import render_template
+
     if args.verbose:
         lark_logger.setLevel(logging.DEBUG)
 
     if args.input:
-        emmy_json = args.input.read_text()
+        emmy_json = args.input.read_bytes()
     else:
         emmy_json = get_doc_data(args.project_root, env_vars)
 
     docs = Index.model_validate_json(emmy_json)
-    transformer = TreeHydrator(docs)
-    parser = Lark(TYPE_GRAMMAR, parser="lalr", debug=True, transformer=transformer)
-    transformer.parser = parser  # cringe: ignore o:]
-    doc = Doc(docs, parser)
+    doc = Doc(docs, partial(build_parser, docs, debug=args.verbose))
     fmt = "markdown" if args.format == "md" else "vimdoc"
 
-    # In pre-commit mode, hash the existing file before writing
-    existing_hash = None
+    # In pre-commit mode, remember the existing file contents before writing
+    existing = None
     if args.pre_commit and args.output and args.output.exists():
-        existing_hash = hashlib.sha256(args.output.read_bytes()).hexdigest()
+        existing = args.output.read_bytes()
 
     result = render_template(
         args.template,
@@ -347,20 +395,25 @@ def main() -> int:
     )
 
     if args.output:
+        result_bytes = result.encode()
+        if existing is not None and existing == result_bytes:
+            if args.verbose:
+                print(f"Output unchanged: {args.output}", file=sys.stderr)
+            return 0
+
         args.output.parent.mkdir(parents=True, exist_ok=True)
-        args.output.write_text(result)
+        args.output.write_bytes(result_bytes)
         if args.verbose:
             print(f"Output written to: {args.output}", file=sys.stderr)
 
         if args.pre_commit:
-            new_hash = hashlib.sha256(args.output.read_bytes()).hexdigest()
-            if existing_hash and existing_hash != new_hash:
+            if existing is not None:
                 print(
                     f"Documentation file {args.output} was updated. Please stage the changes.",
                     file=sys.stderr,
                 )
                 return 1
-            elif not existing_hash:
+            else:
                 print(
                     f"Documentation file {args.output} was created. Please stage the changes.",
                     file=sys.stderr,
@@ -7,19 +7,40 @@ A better approach would be to generate Pandoc AST only
 in Jinja and use Pandoc writers to create both outputs.
 """
 
+import atexit
+import hashlib
+import os
 import re
 import subprocess
+import tempfile
 import textwrap
 from collections.abc import Callable
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Literal
 
-from jinja2 import Environment, FileSystemLoader, Template
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
 from jinja2.ext import ExprStmtExtension, LoopControlExtension
 
-from .render import DocExtension, MarkdownRenderer, VimHelpRenderer, wrap
+from .cache import cache_dir
+from .render import (
+    DocExtension,
+    MarkdownRenderer,
+    VimHelpRenderer,
+    compile_globs,
+    wrap,
+)
 
 TOC_INSERT_MARKER = "<__INSERT_TOC__>"
+_TOC_INSERT_RE = re.compile(re.escape(TOC_INSERT_MARKER) + "\n")
+
+
+@lru_cache(maxsize=512)
+def _compile(pattern: str) -> re.Pattern:
+    """
+    Compile regex patterns passed to ``extract_lines`` once per process.
+    """
+    return re.compile(pattern)
 
 
 def extract_lines(
@@ -51,36 +72,42 @@ def extract_lines(
     if not file_path.exists():
         raise FileNotFoundError(f"File not found: {file_path}")
 
-    lines = file_path.read_text(encoding="utf-8", newline="\n").splitlines()
-
-    start_idx = 0
-    if start:
-        pat = re.compile(start)
-        for i, line in enumerate(lines):
-            if pat.match(line):
-                start_idx = i
-                break
-        else:
-            # Pattern not found, return empty
+    # Stream the file instead of reading it completely. We can stop reading
+    # as soon as the stop pattern matches and only keep the extracted lines.
+    with file_path.open(encoding="utf-8", newline="") as fh:
+        lines = (line.rstrip("\r\n") for line in fh)
+
+        if start:
+            pat = _compile(start)
+            for line in lines:
+                if pat.match(line):
+                    break
+            else:
+                # Pattern not found, return empty
+                return ""
+        elif (line := next(lines, None)) is None:
+            # Empty file
             return ""
 
-    # Apply skip_start
-    start_idx = min(start_idx + skip_start, len(lines) - 1)
-
-    # Find stop position
-    end_idx = len(lines)
-    if stop:
-        pat = re.compile(stop)
-        for i in range(start_idx, len(lines)):
-            if pat.match(lines[i]):
-                end_idx = i + 1  # Include the line with stop pattern
+        # Apply skip_start, but don't skip past the last line
+        for _ in range(skip_start):
+            if (nxt := next(lines, None)) is None:
                 break
+            line = nxt
+
+        # Find stop position
+        extracted = [line]
+        if not stop:
+            extracted.extend(lines)
+        elif not (pat := _compile(stop)).match(line):
+            for line in lines:
+                extracted.append(line)  # Include the line with stop pattern
+                if pat.match(line):
+                    break
 
     # Apply skip_end (moves end position backwards)
-    end_idx = max(start_idx + 1, end_idx - skip_end)
-
-    # Extract lines
-    extracted = lines[start_idx:end_idx]
+    if skip_end:
+        extracted = extracted[: max(1, len(extracted) - skip_end)]
 
     if not (include or exclude):
         return "\n".join(extracted)
@@ -88,8 +115,8 @@ def extract_lines(
         include = [include]
     if isinstance(exclude, str):
         exclude = [exclude]
-    includes = [re.compile(p) for p in (include or [])]
-    excludes = [re.compile(p) for p in (exclude or [])]
+    includes = [_compile(p) for p in (include or [])]
+    excludes = [_compile(p) for p in (exclude or [])]
     filtered = []
     for line in extracted:
         if includes:
@@ -112,6 +139,34 @@ def package_root(*sub) -> Path:
     return root.joinpath(*sub).resolve()
 
 
+def bytecode_cache(**options: Any) -> FileSystemBytecodeCache | None:
+    """
+    Get a persistent cache for compiled templates.
+    Jinja only verifies the template source did not change, so entries are
+    additionally keyed on environment ``options`` (including the output format,
+    since filter calls with constant arguments are folded at compile time)
+    and the modules implementing our custom tags and filters as well as
+    the types templates read attributes from, all of which influence
+    the compiled code.
+
+    Returns:
+        Bytecode cache, unless the cache directory is not writable
+    """
+    directory = cache_dir("jinja2")
+    if not os.access(directory, os.W_OK):
+        return None
+    key = repr(
+        (
+            sorted(options.items()),
+            package_root("render.py").stat().st_mtime_ns,
+            package_root("jinja.py").stat().st_mtime_ns,
+            package_root("type_parser.py").stat().st_mtime_ns,
+        )
+    )
+    salt = hashlib.sha256(key.encode()).hexdigest()[:16]
+    return FileSystemBytecodeCache(str(directory), f"{salt}_%s.cache")
+
+
 class JinjaRenderer:
     """Handles Jinja2 template rendering with custom context."""
 
@@ -151,6 +206,12 @@ class JinjaRenderer:
             lstrip_blocks=lstrip_blocks,
             keep_trailing_newline=True,
             extensions=[DocExtension, ExprStmtExtension, LoopControlExtension],
+            bytecode_cache=bytecode_cache(
+                trim_blocks=trim_blocks, lstrip_blocks=lstrip_blocks, fmt=fmt
+            ),
+            # Inbuilt templates are looked up for every dumped type. Templates don't
+            # change during a render, so don't stat their source on each lookup.
+            auto_reload=False,
         )
         if fmt == "vimdoc":
             rend = VimHelpRenderer()
@@ -175,9 +236,14 @@ class JinjaRenderer:
                 "project_name": project_name,
                 "expand": expand,
                 "no_expand": no_expand,
+                # Globs are matched against every expandable type, compile them once
+                "expand_re": compile_globs(expand),
+                "no_expand_re": compile_globs(no_expand),
                 "fmt": fmt,
             }
         )
+        # Compiled string templates, Environment.from_string does not cache them
+        self._str_templates: dict[str, Template] = {}
 
     def _get_context(self, context: dict[str, Any] | None) -> dict[str, Any]:
         if context is None:
@@ -211,16 +277,29 @@ class JinjaRenderer:
         Returns:
             Rendered template as string
         """
-        template = self.env.from_string(template_str)
+        try:
+            template = self._str_templates[template_str]
+        except KeyError:
+            template = self._str_templates[template_str] = self.env.from_string(
+                template_str
+            )
         return self._render(template, context)
 
     def _render(self, template: Template, context: dict):
         context = self._get_context(context)
+        self.env.extensions[DocExtension.identifier].reset()
         out = template.render(**context).strip("\n") + "\n"
-        if out.find(TOC_INSERT_MARKER + "\n") >= 0:
-            toc = self._render_toc()
-            out = out.replace(TOC_INSERT_MARKER + "\n", toc)
-        return out
+        toc = None
+
+        def insert_toc(_: re.Match) -> str:
+            # Only render the ToC if the template requested it, and only once
+            nonlocal toc
+            if toc is None:
+                toc = self._render_toc()
+            return toc
+
+        # Single scan instead of find() + replace()
+        return _TOC_INSERT_RE.sub(insert_toc, out)
 
     def _render_toc(self):
         return self.env.get_template("toc.jinja").render()
@@ -259,10 +338,108 @@ class JinjaRenderer:
         self.env.tests[name] = func
 
 
+class PandocServer:
+    """
+    Long-lived ``pandoc lua`` process that converts Markdown snippets
+    to Vimdoc using the custom writer. Spawning pandoc and loading the writer
+    for every docstring dominates rendering time otherwise.
+    The process is started on first use.
+    """
+
+    # Pandoc's default for --columns
+    default_columns: int = 72
+
+    def __init__(self):
+        self._proc: subprocess.Popen | None = None
+        # pandoc's stderr, a file instead of a pipe to avoid blocking on it
+        self._stderr = None
+
+    def _start(self) -> subprocess.Popen:
+        if self._proc is None or self._proc.poll() is not None:
+            self.close()
+            self._stderr = tempfile.TemporaryFile()
+            self._proc = subprocess.Popen(
+                [
+                    "pandoc",
+                    "lua",
+                    str(package_root("pandoc", "vimdoc_server.lua")),
+                    str(package_root("pandoc", "vimdoc_writer.lua")),
+                ],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=self._stderr,
+            )
+        return self._proc
+
+    def _died(self) -> RuntimeError:
+        """
+        Build the error for a pandoc process that exited unexpectedly,
+        including what it printed to stderr.
+        """
+        try:
+            self._proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            pass
+        self._stderr.seek(0)
+        stderr = self._stderr.read().decode(errors="replace").strip()
+        msg = f"pandoc exited unexpectedly (exit code {self._proc.returncode})"
+        return RuntimeError(f"{msg}: {stderr}" if stderr else msg)
+
+    def convert(self, text: str, columns: int | None = None) -> str:
+        """
+        Convert a Markdown snippet to Vimdoc.
+
+        Args:
+            text: Markdown formatted string
+            columns: Maximum line width. Defaults to pandoc's default.
+
+        Returns:
+            Vimdoc formatted string
+        """
+        proc = self._start()
+        data = text.encode()
+        try:
+            proc.stdin.write(
+                f"{columns or self.default_columns} {len(data)}\n".encode()
+            )
+            proc.stdin.write(data)
+            proc.stdin.flush()
+            header = proc.stdout.readline().decode()
+        except BrokenPipeError as err:
+            raise self._died() from err
+        if not header:
+            raise self._died()
+        status, length = header.split()
+        result = proc.stdout.read(int(length)).decode()
+        if status != "ok":
+            raise RuntimeError(f"pandoc failed to convert Markdown: {result}")
+        return result
+
+    def close(self):
+        if self._proc is not None:
+            try:
+                self._proc.stdin.close()
+            except BrokenPipeError:
+                pass
+            self._proc.wait()
+            self._proc.stdout.close()
+            self._proc = None
+        if self._stderr is not None:
+            self._stderr.close()
+            self._stderr = None
+
+
+PANDOC = PandocServer()
+atexit.register(PANDOC.close)
+
+
+@lru_cache(maxsize=4096)
 def markdown_to_vimdoc(text: str, indent: int | None = None) -> str:
     """
     Convert markdown text to vimdoc format using pandoc.
     Used to dump docstrings into vimdocs with correct formatting.
+    Results are cached since identical docstrings are common
+    (overloads, inherited members, boilerplate).
 
     Args:
         text: Markdown formatted string
@@ -274,20 +451,9 @@ def markdown_to_vimdoc(text: str, indent: int | None = None) -> str:
     if not text or not text.strip():
         return text
 
-    writer = package_root("pandoc", "vimdoc_writer.lua")
-    cmd = ["pandoc", "-f", "markdown", "-t", str(writer)]
-    if indent:
-        cmd.append(f"--columns={78 - indent}")
-
-    # Run pandoc to convert markdown to vimdoc (help text format).
+    # Convert markdown to vimdoc (help text format).
     # Don't catch errors, otherwise we render invalid docs.
-    result = subprocess.run(
-        cmd,
-        input=text,
-        text=True,
-        capture_output=True,
-        check=True,
-    ).stdout
+    result = PANDOC.convert(text, columns=78 - indent if indent else None)
     if indent:
         return textwrap.indent(result, " " * indent)
     return result
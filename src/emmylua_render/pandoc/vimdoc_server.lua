@@ -0,0 +1,32 @@
+-- Long-running conversion loop for `pandoc lua`, avoids spawning pandoc and
+-- loading the custom writer for every single docstring.
+--
+-- Usage: pandoc lua vimdoc_server.lua /path/to/vimdoc_writer.lua
+--
+-- Protocol (all lengths in bytes):
+--   Request:  "<columns> <length>\n<markdown>"
+--   Response: "ok <length>\n<vimdoc>" or "err <length>\n<message>"
+-- The loop exits when stdin is closed.
+
+dofile(arg[1])
+
+local stdin, stdout = io.stdin, io.stdout
+
+---@param text string Markdown snippet
+---@param columns integer Maximum width of rendered lines
+---@return string vimdoc
+local function convert(text, columns)
+  local doc = pandoc.read(text, "markdown")
+  return tostring(Writer(doc, pandoc.WriterOptions({ columns = columns })))
+end
+
+while true do
+  local header = stdin:read("l")
+  if not header then break end
+  local columns, len = header:match("^(%d+) (%d+)$")
+  local text = stdin:read(tonumber(len))
+  local ok, res = pcall(convert, text, tonumber(columns))
+  res = tostring(res)
+  stdout:write((ok and "ok " or "err ") .. #res .. "\n" .. res)
+  stdout:flush()
+end
@@ -2,10 +2,19 @@
 Pydantic models for emmylua_doc_cli JSON output.
 """
 
+from collections.abc import Iterator, Mapping
+from functools import cached_property
 from pathlib import Path
-from typing import Any, Literal
+from typing import Annotated, Any, Literal
 
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    TypeAdapter,
+    ValidationInfo,
+    field_validator,
+)
 
 
 class TagNameContent(BaseModel):
@@ -46,6 +55,11 @@ class Property(BaseModel):
     deprecation_reason: str | None = None
     tag_content: list[TagNameContent] | None = None
 
+    @cached_property
+    def tags(self) -> dict[str, str]:
+        """Tag contents by tag name."""
+        return {tag.tag_name: tag.content for tag in (self.tag_content or [])}
+
 
 class FieldMember(Property):
     """Field member with discriminator."""
@@ -74,7 +88,7 @@ class FnMember(Property):
 
 
 # Discriminated union for Member (table entries)
-Member = FnMember | FieldMember
+Member = Annotated[FnMember | FieldMember, Field(discriminator="type")]
 
 
 class GlobalTable(Property):
@@ -97,7 +111,7 @@ class GlobalField(Property):
 
 
 # Discriminated union for LuaGlobal
-LuaGlobal = GlobalTable | GlobalField
+LuaGlobal = Annotated[GlobalTable | GlobalField, Field(discriminator="type")]
 
 
 class LuaModule(Property):
@@ -154,56 +168,112 @@ class Alias(Property):
 
 
 # Discriminated union for LuaType
-LuaType = Class | LuaEnum | Alias
+LuaType = Annotated[Class | LuaEnum | Alias, Field(discriminator="type")]
+
+
+class LazyModels[T: BaseModel](Mapping[str, T]):
+    """
+    Read-only mapping of names to emmylua_doc_cli entries.
+    Entries are kept as raw JSON data and only validated into their model
+    when they are accessed, since templates usually render a small subset
+    of the whole index.
+    """
+
+    def __init__(
+        self,
+        adapter: TypeAdapter[T],
+        raw: dict[str, dict[str, Any]],
+        cache: dict[str, T] | None = None,
+    ):
+        self._adapter = adapter
+        self._raw = raw
+        # Shared between subsets to avoid validating an entry more than once
+        self._cache = {} if cache is None else cache
+
+    def __getitem__(self, name: str) -> T:
+        try:
+            return self._cache[name]
+        except KeyError:
+            pass
+        obj = self._cache[name] = self._adapter.validate_python(self._raw[name])
+        return obj
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._raw
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._raw)
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def partition(self, *typs: str) -> list["LazyModels[T]"]:
+        """
+        Split entries by their ``type`` discriminator in a single pass
+        without validating them. Entries of other types are dropped.
+        """
+        parts: dict[str, dict[str, dict[str, Any]]] = {typ: {} for typ in typs}
+        for name, raw in self._raw.items():
+            try:
+                parts[raw.get("type")][name] = raw
+            except KeyError:
+                pass
+        return [LazyModels(self._adapter, parts[typ], self._cache) for typ in typs]
+
+
+_ADAPTERS: dict[str, TypeAdapter] = {
+    "modules": TypeAdapter(LuaModule),
+    "types": TypeAdapter(LuaType),
+    "globals": TypeAdapter(LuaGlobal),
+}
 
 
 class Index(BaseModel):
     """Root index structure."""
 
-    modules: dict[str, LuaModule] = Field(default_factory=list)
-    types: dict[str, LuaType] = Field(default_factory=list)
-    globals: dict[str, LuaGlobal] = Field(default_factory=list)
+    modules: LazyModels[LuaModule] = Field(default_factory=list, validate_default=True)
+    types: LazyModels[LuaType] = Field(default_factory=list, validate_default=True)
+    globals: LazyModels[LuaGlobal] = Field(default_factory=list, validate_default=True)
     config: dict[str, Any] = Field(default_factory=dict)
 
     # Calculated properties. Cached for efficiency.
-    _classes: dict[str, Class] = None
-    _aliases: dict[str, Alias] = None
-    _enums: dict[str, LuaEnum] = None
+    _classes: LazyModels[Class] | None = None
+    _aliases: LazyModels[Alias] | None = None
+    _enums: LazyModels[LuaEnum] | None = None
 
     model_config = ConfigDict(
-        # Use discriminator for automatic union parsing
-        discriminator="type"
+        # Allow LazyModels
+        arbitrary_types_allowed=True,
     )
 
     @field_validator("modules", "types", "globals", mode="before")
     @classmethod
-    def _to_dict[T](cls, raw: list[T]) -> dict[str, T]:
+    def _to_dict(cls, raw: list[dict[str, Any]], info: ValidationInfo) -> LazyModels:
         """
-        emmylua_doc_cli returns a list of modules/types/globals. Transform it into a dict
-        to allow named indexing.
+        emmylua_doc_cli returns a list of modules/types/globals. Transform it into a
+        lazily validated dict to allow named indexing.
         """
-        return {it["name"]: it for it in raw}
+        return LazyModels(_ADAPTERS[info.field_name], {it["name"]: it for it in raw})
+
+    def _split_types(self) -> None:
+        self._classes, self._aliases, self._enums = self.types.partition(
+            "class", "alias", "enum"
+        )
 
     @property
-    def classes(self):
-        if not self._classes:
-            self._classes = {
-                name: cls for name, cls in self.types.items() if cls.type == "class"
-            }
+    def classes(self) -> LazyModels[Class]:
+        if self._classes is None:
+            self._split_types()
         return self._classes
 
     @property
-    def aliases(self):
-        if not self._aliases:
-            self._aliases = {
-                name: cls for name, cls in self.types.items() if cls.type == "alias"
-            }
+    def aliases(self) -> LazyModels[Alias]:
+        if self._aliases is None:
+            self._split_types()
         return self._aliases
 
     @property
-    def enums(self):
-        if not self._enums:
-            self._enums = {
-                name: cls for name, cls in self.types.items() if cls.type == "enum"
-            }
+    def enums(self) -> LazyModels[LuaEnum]:
+        if self._enums is None:
+            self._split_types()
         return self._enums
@@ -9,14 +9,18 @@ targeting newlines and text length.
 
 import re
 from abc import ABC, abstractmethod
-from fnmatch import fnmatchcase
-from functools import wraps
+from collections.abc import Callable, Iterable
+from fnmatch import translate
+from functools import cached_property, lru_cache
+from itertools import chain, islice, repeat
+from pathlib import Path
 from typing import Any, Literal
 
-from jinja2 import nodes
+from jinja2 import Template, nodes
 from jinja2.ext import Extension
 from jinja2.nodes import Keyword, Node
 from jinja2.parser import Parser
+from lark import Lark
 
 from emmylua_render.raw_models import Index
 from emmylua_render.type_parser import (
@@ -31,6 +35,7 @@ from emmylua_render.type_parser import (
 )
 
 TYPEREF = {}
+DEFAULT_TEMPLATES = Path(__file__).parent / "default_templates"
 
 
 def resolve_anchor(
@@ -40,39 +45,76 @@ def resolve_anchor(
         return ""
     if not prefix or literal:
         return anchor
-    return "-".join((prefix, anchor))
+    return f"{prefix}-{anchor}"
+
+
+@lru_cache(maxsize=256)
+def _compile_glob(glob: str) -> re.Pattern:
+    """
+    Compile a single case-sensitive ``fnmatch`` glob.
+    """
+    return re.compile(translate(glob))
+
+
+def compile_globs(globs: Iterable[str] | None) -> re.Pattern | None:
+    """
+    Compile ``fnmatch`` globs into a single case-sensitive pattern,
+    which matches if any of the globs match.
+    Returns None if no globs are given.
+    """
+    if not globs:
+        return None
+    return re.compile("|".join(f"(?:{translate(glob)})" for glob in globs))
+
+
+def _identity[T](data: T) -> T:
+    return data
+
+
+@lru_cache(maxsize=1024)
+def _names_pattern(names: frozenset[str]) -> re.Pattern:
+    """
+    Compile a pattern matching any of the literal ``names``, all in a single scan.
+    Longer names are preferred, so a name does not match inside a longer one.
+    """
+    return re.compile(
+        "|".join(re.escape(name) for name in sorted(names, key=lambda n: (-len(n), n)))
+    )
 
 
 class Doc:
     """
     Exposes type parser for emmylua_doc_cli output to Jinja context.
+    The parser is only built once a template actually needs to parse a type.
     """
 
     docs: Index
 
-    def __init__(self, docs: Index, parser):
+    def __init__(self, docs: Index, parser_factory: Callable[[], Lark]):
         self.docs = docs
-        self.parser = parser
+        self._parser_factory = parser_factory
+
+    @cached_property
+    def parser(self) -> Lark:
+        return self._parser_factory()
 
     def get(self, typ):
         return self.parser.parse(typ)
 
     def filter(self, glob="*", *, kind=None):
-        glob = glob or "*"
+        match = _compile_glob(glob or "*").match
         match_typ = None
         if kind == "mod":
-            cands = map(
-                lambda x: self.docs.modules[x].typ,
-                filter(lambda x: fnmatchcase(x, glob), self.docs.modules),
-            )
+            modules = self.docs.modules
+            cands = (modules[name].typ for name in modules if match(name))
         elif kind == "class":
-            cands = filter(lambda x: fnmatchcase(x, glob), self.docs.classes)
+            cands = [name for name in self.docs.classes if match(name)]
         elif kind == "alias":
-            cands = filter(lambda x: fnmatchcase(x, glob), self.docs.aliases)
+            cands = [name for name in self.docs.aliases if match(name)]
         elif kind == "enum":
-            cands = filter(lambda x: fnmatchcase(x, glob), self.docs.enums)
+            cands = [name for name in self.docs.enums if match(name)]
         else:
-            cands = filter(lambda x: fnmatchcase(x, glob), self.docs.types)
+            cands = [name for name in self.docs.types if match(name)]
             if kind:
                 # TODO: Pretty sure there are no other kinds to match here,
                 #       we'd need to e.g. match on the parsed `typ` of aliases.
@@ -91,7 +133,8 @@ class Doc:
 
 class DocExtension(Extension):
     tags = {"anchor", "section"}
-    prefix_initialized: bool = False
+    initialized: bool = False
+    expand_all: bool | None = None
 
     def __init__(self, environment):
         super().__init__(environment)
@@ -99,6 +142,8 @@ class DocExtension(Extension):
             "index": {},
             "glossary": {},
             "referenced_types": set(),
+            # Subset of referenced_types that is rendered into the typeref
+            "documented_referenced_types": set(),
             "rendered_types": set(),
         }
         toc["cur"] = toc["index"]
@@ -107,6 +152,23 @@ class DocExtension(Extension):
             anchor_prefix="",
             toc=toc,
         )
+        self._dispatch: dict[type, Callable[[Any], Any]] = {
+            str: _identity,
+            list: self._render_list,
+            DocumentedFunction: self._render_fun,
+            DocumentedField: self._render_field,
+            ClassType: self._render_class,
+            AliasType: self._render_alias,
+            EnumType: self._render_enum,
+        }
+        self._templates: dict[str, Template] = {}
+        self._rendered_fields: dict[int, tuple[DocumentedField, str]] = {}
+        self._type_info: dict[
+            int,
+            tuple[
+                ResolvedType, frozenset[ResolvedType], frozenset[DocumentedType], str
+            ],
+        ] = {}
         self.environment.globals["__toc__"] = toc
         self.environment.globals["typeref"] = TYPEREF
         self.environment.filters["should_expand"] = self.should_expand
@@ -115,28 +177,53 @@ class DocExtension(Extension):
             self.environment.finalize = self._finalizer
         else:
             finalizer = self.environment.finalize
+            own_finalizer = self._finalizer
 
-            @wraps(finalizer)
-            def wrapper(self, data):
-                return finalizer(self._finalizer(data))
+            def wrapper(data):
+                return finalizer(own_finalizer(data))
 
             self.environment.finalize = wrapper
 
+    def reset(self) -> None:
+        """
+        Reset state collected while rendering a template, e.g. the ToC.
+        Allows to render multiple top-level templates with the same environment.
+        Containers are cleared instead of replaced since templates hold references to them.
+        """
+        toc = self.environment.toc
+        for key in (
+            "index",
+            "glossary",
+            "referenced_types",
+            "documented_referenced_types",
+            "rendered_types",
+        ):
+            toc[key].clear()
+        toc["cur"] = toc["index"]
+        self.environment.section_stack.clear()
+        # Reinitializes the anchor prefix
+        self.initialized = False
+        # Memoized fields would skip registering their referenced types otherwise
+        self._rendered_fields.clear()
+
     def should_expand(self, typ) -> bool:
         """
         Check whether a struct's fields should be expanded.
         """
-        expand = self.environment.emmylua_render.get("expand")
-        no_expand = self.environment.emmylua_render.get("no_expand")
-        if not expand and not no_expand:
+        if self.expand_all is None:
+            # Options are not yet defined when init runs
+            opts = self.environment.emmylua_render
+            self._expand = opts.get("expand_re")
+            self._no_expand = opts.get("no_expand_re")
+            self.expand_all = self._expand is None and self._no_expand is None
+        if self.expand_all:
             return True
+        expand, no_expand = self._expand, self._no_expand
         t = str(typ)
-        if expand:
-            if not any(fnmatchcase(t, exp) for exp in expand):
-                return False
-        if no_expand:
-            if any(fnmatchcase(t, exp) for exp in no_expand):
-                return False
+        if expand is not None and not expand.match(t):
+            return False
+        if no_expand is not None and no_expand.match(t):
+            return False
         return True
 
     def humanize(self, typ: ResolvedType) -> str:
@@ -145,10 +232,13 @@ class DocExtension(Extension):
         and keeps track of linked types, which can later be rendered
         into a reference section.
         """
+        if not self.initialized:
+            self._initialize()
         toc = self.environment.toc
-        link = self.environment.filters["link"]
-        refs = typ.refs()
-        toc["referenced_types"] = toc["referenced_types"].union(refs)
+        link = self._link
+        refs, documented, typ_str = self._type_refs(typ)
+        toc["referenced_types"].update(refs)
+        toc["documented_referenced_types"].update(documented)
         # We could shortcut this logic for simple Class/Alias/Enum types
         # by doing the following, but that could be premature optimization:
         # if isinstance(typ, DocumentedType) and not isinstance(
@@ -157,22 +247,52 @@ class DocExtension(Extension):
         #     # Shortcut for simple Class/Alias/Enum types
         #     # but: my.custom.class<my.custom.alias> needs the hacky link rendering
         #     return link(res, literal=True)
-        res = wrap(str(typ), "`")
-        for ref in refs:
-            # Don't render links to undocumented structs
-            if isinstance(ref, DocumentedType):
-                s = str(ref)
-                # Hacky solution: Replace struct names.
-                # To do that, we need to ensure literal strings are terminated before
-                # and resumed after the link. If it's the fist/last word, we would render
-                # a double backtick, which we need to remove (otherwise it might be rendered verbatim)
-                res = res.replace(s, wrap(link(s, literal=True), "`")).replace("``", "")
-        return res
+        res = wrap(typ_str, "`")
+        # Don't render links to undocumented structs
+        if not documented:
+            return res
+        names = frozenset(str(ref) for ref in documented)
+        # Hacky solution: Replace struct names.
+        # To do that, we need to ensure literal strings are terminated before
+        # and resumed after the link. If it's the fist/last word, we would render
+        # a double backtick, which we need to remove (otherwise it might be rendered verbatim)
+        res = _names_pattern(names).sub(
+            lambda m: wrap(link(m[0], literal=True), "`"), res
+        )
+        return res.replace("``", "")
+
+    def _type_refs(
+        self, typ: ResolvedType
+    ) -> tuple[frozenset[ResolvedType], frozenset[DocumentedType], str]:
+        """
+        Get referenced struct types (all and documented ones only)
+        and string representation of a type.
+        Types compute these from scratch on each call, but the same type objects
+        are humanized repeatedly, so cache them by identity.
+        """
+        try:
+            return self._type_info[id(typ)][1:]
+        except KeyError:
+            pass
+        refs = frozenset(typ.refs())
+        documented = frozenset(ref for ref in refs if isinstance(ref, DocumentedType))
+        typ_str = str(typ)
+        # Keep a reference to the type to ensure its id is not reused
+        self._type_info[id(typ)] = (typ, refs, documented, typ_str)
+        return refs, documented, typ_str
 
     def _finalizer(self, data):
         """
         Allow dumping type objects to trigger inbuilt templates
         """
+        # Fast path for the most common (exact) types. Optional/array/variadic/field types
+        # are dynamically subclassed, those are dispatched via isinstance below.
+        try:
+            handler = self._dispatch[type(data)]
+        except KeyError:
+            pass
+        else:
+            return handler(data)
         if data is TYPEREF:
             return self._render_typeref()
         if isinstance(data, list):
@@ -183,68 +303,107 @@ class DocExtension(Extension):
             return self._render_fun(data)
         if isinstance(data, DocumentedField):
             return self._render_field(data)
-        toc = self.environment.toc
         if isinstance(data, ClassType):
-            toc["rendered_types"].add(data)
             return self._render_class(data)
         if isinstance(data, AliasType):
-            toc["rendered_types"].add(data)
             return self._render_alias(data)
         if isinstance(data, EnumType):
-            toc["rendered_types"].add(data)
             return self._render_enum(data)
         raise ValueError(f"Unknown class, cannot render: {type(data)}")
 
+    def _get_template(self, name: str) -> Template:
+        """
+        Get an inbuilt template. They are used for every dumped type,
+        so keep them around instead of going through the environment each time.
+        """
+        try:
+            return self._templates[name]
+        except KeyError:
+            pass
+        template = self._templates[name] = self.environment.get_template(name)
+        return template
+
     def _render_typeref(self):
         # Ensure indirectly referenced types (those that are only referenced by types
-        # in the typeref) are included there as well
+        # in the typeref) are included there as well. Newly discovered types
+        # can reference further types, so process them until there are none left.
         visited = set()
         toc = self.environment.toc
-        for typ in list(toc["referenced_types"]):
-            toc["referenced_types"] = toc["referenced_types"].union(
-                typ.member_refs(visited)
-            )
-        refs = {
-            typ
-            for typ in toc["referenced_types"].difference(toc["rendered_types"])
-            if isinstance(typ, DocumentedType)
-        }
-        return self.environment.get_template("typeref.jinja").render(refs=refs)
+        referenced = toc["referenced_types"]
+        documented = toc["documented_referenced_types"]
+        worklist = list(referenced)
+        while worklist:
+            for ref in worklist.pop().member_refs(visited):
+                if ref not in referenced:
+                    referenced.add(ref)
+                    worklist.append(ref)
+                    if isinstance(ref, DocumentedType):
+                        documented.add(ref)
+        refs = documented - toc["rendered_types"]
+        return self._get_template("typeref.jinja").render(refs=refs)
 
     def _render_fun(self, fun: DocumentedFunction):
-        return self.environment.get_template("function.jinja").render(fun=fun)
+        return self._get_template("function.jinja").render(fun=fun)
 
     def _render_field(self, field: DocumentedField):
-        return self.environment.get_template("field.jinja").render(field=field)
+        # Fields don't open sections/anchors, so their output does not depend on
+        # where they are rendered. Functions and types do, hence are not memoized.
+        try:
+            return self._rendered_fields[id(field)][1]
+        except KeyError:
+            pass
+        res = self._get_template("field.jinja").render(field=field)
+        # Keep a reference to the field to ensure its id is not reused
+        self._rendered_fields[id(field)] = (field, res)
+        return res
 
     def _render_class(self, cls: ClassType):
-        return self.environment.get_template("class.jinja").render(cls=cls)
+        self.environment.toc["rendered_types"].add(cls)
+        return self._get_template("class.jinja").render(cls=cls)
 
     def _render_alias(self, alias: AliasType):
-        return self.environment.get_template("alias.jinja").render(alias=alias)
+        self.environment.toc["rendered_types"].add(alias)
+        return self._get_template("alias.jinja").render(alias=alias)
 
     def _render_enum(self, enum: EnumType):
-        return self.environment.get_template("enum.jinja").render(enum=enum)
+        self.environment.toc["rendered_types"].add(enum)
+        return self._get_template("enum.jinja").render(enum=enum)
 
     def _render_list(self, lst: list):
         """Render list items in separate lines. Allows to auto-dump all functions in a class, for example."""
-        return self.environment.get_template("list.jinja").render(lst=lst)
-
-    def preprocess(self, *args, **kwargs):
-        """Hack to initialize project name anchor prefix, which is not yet defined when init runs"""
-        if not self.prefix_initialized:
-            self._initialize_prefix()
-        return super().preprocess(*args, **kwargs)
+        template = self._get_template("list.jinja")
+        if Path(template.filename).parent.parent != DEFAULT_TEMPLATES:
+            return template.render(lst=lst)
+        # The inbuilt template only concatenates the finalized items,
+        # don't evaluate it unless it has been overridden
+        finalize = self.environment.finalize
+        return "".join(str(finalize(it)) for it in lst)
 
     def parse(self, parser) -> Node:
         tag = next(parser.stream)
         return getattr(self, tag.value)(parser)
 
-    def _initialize_prefix(self) -> None:
+    def _initialize(self) -> None:
+        """
+        Hack to initialize project name anchor prefix and renderer filters,
+        which are not yet defined when init runs.
+        Happens during rendering since templates loaded from the bytecode cache are not parsed.
+        """
         self.environment.anchor_prefix = (
             self.environment.emmylua_render.get("project_name") or ""
         )
-        self.prefix_initialized = True
+        # Called for every type/section, avoid looking them up each time
+        filters = self.environment.filters
+        self._anchor = filters["anchor"]
+        self._heading = filters["heading"]
+        self._link = filters["link"]
+        self._vimdoc = filters.get("vimdoc")
+        self.initialized = True
+
+    def _get_anchor_prefix(self) -> str:
+        if not self.initialized:
+            self._initialize()
+        return self.environment.anchor_prefix
 
     def _parse_kwargs(self, parser: Parser, kwargs: dict[str, Any]) -> dict[str, Any]:
         if parser.stream.skip_if("name:with"):
@@ -318,13 +477,9 @@ class DocExtension(Extension):
         ).set_lineno(lineno)
 
     def _render_anchor(self, name: str, *, literal: bool, caller):
-        prefix = self.environment.anchor_prefix
-        content = caller()
-        if content and content[0] == "\n":
-            content = content[1:]
-        return "\n" + self.environment.filters["anchor"](
-            content, name, prefix=prefix, literal=literal
-        )
+        prefix = self._get_anchor_prefix()
+        content = caller().removeprefix("\n")
+        return "\n" + self._anchor(content, name, prefix=prefix, literal=literal)
 
     def _render_section(
         self,
@@ -336,7 +491,7 @@ class DocExtension(Extension):
         caller,
     ):
         stack = self.environment.section_stack
-        prefix = self.environment.anchor_prefix
+        prefix = self._get_anchor_prefix()
         toc = self.environment.toc
 
         # Insert ToC
@@ -357,25 +512,30 @@ class DocExtension(Extension):
         toc["cur"]["__a__"] = anchor
 
         # Evaluate heading
-        heading_text = self.environment.filters["heading"](
+        heading_text = self._heading(
             title, level, anchor=anchor, prefix=prefix, literal=True
         )
 
         content = caller()
         if markdown and self.environment.emmylua_render["fmt"] != "markdown":
-            content = self.environment.filters["vimdoc"](content)
-        if content and content[0] == "\n":
-            content = content[1:]
+            content = self._vimdoc(content)
 
         stack.pop()
         toc["cur"] = prev_cur
         self.environment.anchor_prefix = prefix
 
+        # A leading newline in the content serves as the separator,
+        # which avoids copying the content just to strip it
+        if content.startswith("\n"):
+            return f"\n{heading_text}{content}"
         return f"\n{heading_text}\n{content}"
 
 
+_SLUG_RE = re.compile(r"[\W_]+")
+
+
 def slugify(text):
-    return re.sub(r"[\W_]+", "-", text).lower().strip("-")
+    return _SLUG_RE.sub("-", text).lower().strip("-")
 
 
 def wrap(text, char, suffix=None):
@@ -386,6 +546,21 @@ def join(it):
     return "\n".join(it)
 
 
+def _leading_blank_lines(lines: list[str]) -> tuple[int, int]:
+    """
+    Find the first line with content, which receives the anchor.
+    If all lines are blank, the anchor is added to the last one.
+
+    Returns:
+        Number of blank lines to render before the anchored line
+        Index of the anchored line
+    """
+    for i, line in enumerate(lines):
+        if line.strip():
+            return i, i
+    return len(lines), len(lines) - 1
+
+
 class Renderer(ABC):
     @abstractmethod
     def anchor(self, line: str, anchor: str) -> str:
@@ -419,20 +594,14 @@ class MarkdownRenderer(Renderer):
         literal: bool = False,
     ) -> str:
         if prefix and not literal:
-            anchor = "-".join((anchor, prefix))
+            anchor = f"{anchor}-{prefix}"
         anchor_tag = f'<a id="{anchor}"></a>'
         lines = line.splitlines()
         if not lines:
             return anchor_tag
-        ret = []
-        while lines and not (first_line := lines.pop(0)).strip():
-            ret.append("")
-        if first_line:
-            ret.append(f"{first_line}{anchor_tag}")
-            ret.extend(lines)
-        else:
-            ret.append(anchor_tag)
-        return join(ret)
+        blank, first = _leading_blank_lines(lines)
+        lines[first] += anchor_tag
+        return join(chain(repeat("", blank), islice(lines, first, None)))
 
     def heading(
         self,
@@ -480,26 +649,23 @@ class VimHelpRenderer(Renderer):
         force_nl: bool = False,
     ) -> str:
         if prefix and not literal:
-            anchor = "-".join((prefix, anchor))
+            anchor = f"{prefix}-{anchor}"
         anchor_tag = wrap(anchor, "*")
         lines = line.splitlines()
         if not lines:
             return anchor_tag
-        ret = []
-        while lines and not (first_line := lines.pop(0)).strip():
-            ret.append("")
+        blank, first = _leading_blank_lines(lines)
+        first_line = lines[first]
         if (
             first_line
             and not force_nl
             and len(first_line) + len(anchor_tag) + 2 < self.width
         ):
             anchor_width = self.width - len(first_line)
-            ret.append(f"{first_line}{anchor_tag:>{anchor_width}}")
+            lines[first] = f"{first_line}{anchor_tag:>{anchor_width}}"
         else:
-            ret.append(f"{anchor_tag:>{self.width}}")
-            ret.append(first_line)
-        ret.extend(lines)
-        return join(ret)
+            lines[first] = f"{anchor_tag:>{self.width}}\n{first_line}"
+        return join(chain(repeat("", blank), islice(lines, first, None)))
 
     def heading(
         self,
@@ -515,19 +681,13 @@ class VimHelpRenderer(Renderer):
         anchor = resolve_anchor(anchor, prefix, literal=literal)
         force_nl = False
         if level == 2:
-            # Don't uppercase literal strings
-            literal_str = False
-            use_tilde = False  # If we can't uppercase everything, we need to use a ~
-            res = ""
-            for char in text:
-                if char == "`":
-                    literal_str = not literal_str
-                    use_tilde = True
-                if literal_str:
-                    res += char
-                else:
-                    res += char.upper()
-            if use_tilde:
+            # Don't uppercase literal strings, which are the odd parts
+            parts = text.split("`")
+            res = "`".join(
+                part if i % 2 else part.upper() for i, part in enumerate(parts)
+            )
+            # If we can't uppercase everything, we need to use a ~
+            if len(parts) > 1:
                 text = f"{res} ~"
                 force_nl = True
             else:
@@ -4,19 +4,27 @@ Uses an EBNF parser (Lark) to inspect the strings that emmylua_doc_cli outputs,
 especially for aliases in their ``typ`` attribute.
 """
 
-from copy import deepcopy
+import hashlib
+import sys
+from collections import ChainMap
+from collections.abc import Iterator, Mapping, Sequence
 from dataclasses import dataclass, field, replace
 from enum import Enum
+from functools import cached_property, lru_cache
+from operator import attrgetter
 from typing import Literal, Self
 
-from lark import Lark, Token, Transformer, v_args
+import lark
+from lark import Lark, Token, Transformer
 from lark.exceptions import UnexpectedCharacters, UnexpectedToken
 
+from emmylua_render.cache import cache_dir
 from emmylua_render.raw_models import (
     Alias,
     Class,
     FieldMember,
     FnMember,
+    Index,
     LuaEnum,
     LuaType,
     Property,
@@ -71,10 +79,10 @@ TYPE_GRAMMAR = r"""
       | struct_type                              // my.custom.Class
       | primitive_type                           // number, string, boolean, nil, any, userdata, unknown, ...
       | tuple_type                               // (integer, string), (string, any ...)
-      | "(" primary_type ("|" primary_type)+ ")" -> union_type               // (integer|number), ("foo"|"bar"|boolean)
-      | "(" primary_type ("&" primary_type)+ ")" -> intersection_type        // (MyTrait & MyOtherTrait)
-      | "(" primary_type ("|" primary_type)+ "..." ")" -> union_type_omitted // emmylua_doc_cli hardcodes detail level to basic, which omits items of large unions/tuples
-      | "(" primary_type ("&" primary_type)+ "..." ")" -> intersection_type_omitted // see above
+      // A trailing DOTS marks omitted items: emmylua_doc_cli hardcodes detail level to basic,
+      // which omits items of large unions/tuples. It's passed as the last child (or None).
+      | "(" primary_type ("|" primary_type)+ [DOTS] ")" -> union_type        // (integer|number), ("foo"|"bar"|boolean), (integer|number...)
+      | "(" primary_type ("&" primary_type)+ [DOTS] ")" -> intersection_type // (MyTrait & MyOtherTrait), (MyTrait & MyOtherTrait...)
 
     // This raises ambiguity a lot and it's not emitted by emmylua: (e.g. `integer|string`, `(foo|bar)|baz`, `foo & (bar|baz)`)
     // ?basic_type_extended: \
@@ -132,27 +140,20 @@ TYPE_GRAMMAR = r"""
                    | "false" -> literal_false
 
     // "inbuilt" types, without table (needs to be generic, causes collision)
-    primitive_type: "nil" -> primitive_nil
-                  | "boolean" -> primitive_boolean
-                  | "number" -> primitive_number
-                  | "integer" -> primitive_integer
-                  | "userdata" -> primitive_userdata
-                  | "lightuserdata" -> primitive_lightuserdata
-                  | "thread" -> primitive_thread
-                  | "any" -> primitive_any
-                  | "void" -> primitive_nil
-                  | "self" -> primitive_self
-                  | "function" -> primitive_function
-                  | "string" -> primitive_string
-                  | "unknown" -> primitive_unknown
+    // A single terminal is looked up by the hydrator, avoids a rule per primitive.
+    primitive_type: PRIMITIVE_NAME | SELF
 
     // Terminals
     DOTS: "..."
+    // Higher priority than IDENTIFIER, word boundary avoids matching prefixes of identifiers.
+    PRIMITIVE_NAME.2: /(nil|void|boolean|number|integer|userdata|lightuserdata|thread|any|function|string|unknown)\b/
     SIGNED_INT: ["-"] INT
     SELF: "self" // this seems to be a predefined token, IDENTIFIER does not include it in fun(self: any)
+    // Double-quoted only, but emmylua always dumps string literals with double quotes.
+    // Simpler than common.ESCAPED_STRING, which relies on a lazy match and a lookbehind.
+    ESCAPED_STRING: /"(?:[^"\\\n]|\\.)*"/
     %import common.INT
     %import common.CNAME -> IDENTIFIER
-    %import common.ESCAPED_STRING // uses double-quotes only, but emmylua always dumps string literals with double quotes
 
     // Ignore whitespace.
     // Note: This breaks distinction between long, omitted tuples (string,integer,...) and variadic tuples (string,any ...)
@@ -161,20 +162,31 @@ TYPE_GRAMMAR = r"""
 """
 
 
+# Type name part that reprs of a class start with
+_REPR_HEADS: dict[type, str] = {}
+
+
+def _repr_head(inner_name: str, inner_repr: str) -> str:
+    if inner_repr.startswith(inner_name):
+        return inner_name
+    if (sub_pos := inner_repr.find("([{")) > 0:
+        return inner_repr[0:sub_pos]
+    if inner_repr.startswith(short_name := inner_name.replace("Type", "")):
+        return short_name
+    return ""
+
+
 def wrapped_repr(inner, *, name_prefix="", name_suffix=""):
     inner_repr = repr(inner)
-    inner_name = type(inner).__name__
-    if inner_repr.startswith(inner_name):
-        repr_name = name_prefix + inner_name + name_suffix
-        rest = inner_repr[len(inner_name) :]
-    elif (sub_pos := inner_repr.find("([{")) > 0:
-        inner_name, rest = inner_repr[0:sub_pos], inner_repr[sub_pos:]
-    elif inner_repr.startswith(short_name := inner_name.replace("Type", "")):
-        repr_name = name_prefix + short_name + name_suffix
-        rest = inner_repr[len(short_name) :]
-    else:
-        repr_name, rest = name_prefix + inner_repr + name_suffix, ""
-    return repr_name + rest
+    # The name part is the same for (almost) all instances of a class,
+    # only inspect the repr again if it does not start with the cached one.
+    head = _REPR_HEADS.get(cls := type(inner))
+    if head is None or not inner_repr.startswith(head):
+        if head := _repr_head(cls.__name__, inner_repr):
+            _REPR_HEADS[cls] = head
+    if not head:
+        return name_prefix + inner_repr + name_suffix
+    return name_prefix + head + name_suffix + inner_repr[len(head) :]
 
 
 class TypeKind(Enum):
@@ -210,6 +222,14 @@ class ResolvedType:
         """
         return False
 
+    @cached_property
+    def _has_typevars(self) -> bool:
+        """
+        Whether substituting typevars could change this type.
+        Overridden by types that can (transitively) contain typevars.
+        """
+        return False
+
     def substitute_typevars(self, _typevars: dict[str, "ResolvedType"]) -> Self:
         # Many types can contain generic parameters, so we should be able to just
         # map the function down the chain. By default, don't substitute anything.
@@ -217,27 +237,11 @@ class ResolvedType:
 
     def __deepcopy__(self, memo):
         """
-        Because of some shenanigans in the class structure, we need to account for
-        circular references in instance dicts. Centralize it here since all affected
-        classes inherit from this one.
-        Because that's not fun enough, we also inject a reference to the parser into
-        most instances. It should not (and cannot) be deepcopied.
+        Hydrated types are immutable (their lazily filled caches only derive
+        from the type itself) and reference the parser, which cannot be copied.
+        Like other immutable objects, they are their own deep copy.
         """
-        cls = type(self)
-        new_self = cls.__new__(cls)
-        memo[id(self)] = new_self
-        new_attrs = {}
-        has_parser = False
-        for k, v in self.__dict__.items():
-            if k == "parser":
-                # having the parser in here is shenanigan no 2
-                has_parser = True
-                continue
-            new_attrs[k] = deepcopy(v, memo)
-        if has_parser:
-            new_attrs["parser"] = self.parser
-        object.__setattr__(new_self, "__dict__", new_attrs)
-        return new_self
+        return self
 
     def refs(self) -> set[Self]:
         """
@@ -318,6 +322,38 @@ class AnyType(PrimitiveType):
         return super().__repr__()
 
 
+# Primitive types don't carry any state, share a single instance of each.
+NIL = NilType()
+ANY = AnyType()
+UNKNOWN = UnknownType()
+BOOLEAN = BooleanType()
+STRING = StringType()
+NUMBER = NumberType()
+INTEGER = IntegerType()
+SELF = PrimitiveType("self")
+FUNCTION = PrimitiveType("function")
+THREAD = PrimitiveType("thread")
+USERDATA = PrimitiveType("userdata")
+LIGHTUSERDATA = PrimitiveType("lightuserdata")
+
+# Primitive type names as they appear in type strings
+_PRIMITIVES: dict[str, PrimitiveType] = {
+    "nil": NIL,
+    "void": NIL,
+    "boolean": BOOLEAN,
+    "number": NUMBER,
+    "integer": INTEGER,
+    "userdata": USERDATA,
+    "lightuserdata": LIGHTUSERDATA,
+    "thread": THREAD,
+    "any": ANY,
+    "self": SELF,
+    "function": FUNCTION,
+    "string": STRING,
+    "unknown": UNKNOWN,
+}
+
+
 @dataclass(frozen=True)
 class DocumentedType:
     """
@@ -325,9 +361,6 @@ class DocumentedType:
     """
 
     typedef: Property = field(repr=False, compare=False, kw_only=True)
-    _tags: dict[str, str] | None = field(
-        init=False, repr=False, compare=False, default=None
-    )
 
     @property
     def desc(self) -> str | None:
@@ -347,13 +380,73 @@ class DocumentedType:
 
     @property
     def tags(self) -> dict[str, str]:
-        if self._tags is None:
-            object.__setattr__(
-                self,
-                "_tags",
-                {tag.tag_name: tag.content for tag in (self.typedef.tag_content or [])},
-            )
-        return self._tags
+        return self.typedef.tags
+
+
+class _Delegated(property):
+    """
+    Property of a dynamic wrapper subclass that proxies the wrapped type.
+    """
+
+
+# Dynamic wrapper subclasses, keyed by wrapper and wrapped type class
+_WRAPPER_CLASSES: dict[tuple[type, type], type] = {}
+
+
+def _wrapper_class(
+    wrapper,
+    inner,
+    attr: str,
+    *,
+    prefix: str = "",
+    suffix: str = "",
+    inherit_inner: bool = False,
+) -> type:
+    """
+    Get the class that dynamically subclasses both ``wrapper``'s and ``inner``'s class.
+    Synthesizing classes and inspecting them is expensive, they are shared
+    between all wrappers of the same type class.
+    Attributes of the wrapped type that the wrapper does not define itself
+    are delegated via properties on the class. This avoids overriding
+    ``__getattribute__``, which would run on every single attribute access.
+    Plain inheritance is not enough since inherited class attributes
+    (methods, dataclass defaults) would shadow the wrapped instance's values.
+
+    Args:
+        wrapper: Wrapper instance, not patched yet
+        inner: Wrapped type
+        attr: Name of the attribute on ``wrapper`` that holds ``inner``
+        prefix: Prefix of the inner class name for the synthesized one
+        suffix: Suffix of the inner class name for the synthesized one
+        inherit_inner: Only inherit from the inner class (it is a wrapper itself)
+    """
+    key = (wrapper.__class__, inner.__class__)
+    try:
+        return _WRAPPER_CLASSES[key]
+    except KeyError:
+        pass
+    own = set(dir(wrapper))
+    cls = _WRAPPER_CLASSES[key] = type(
+        prefix + inner.__class__.__name__ + suffix,
+        (inner.__class__,) if inherit_inner else key,
+        {
+            k: _Delegated(attrgetter(f"{attr}.{k}"))
+            for k in dir(inner)
+            if not k.startswith("__") and k not in own
+        },
+    )
+    # The wrapped class can be a synthesized one itself. Its delegating properties
+    # must not take precedence over the wrapper's own attributes.
+    for k in own:
+        if not isinstance(getattr(cls, k, None), _Delegated):
+            continue
+        for base in cls.__mro__:
+            if k in vars(base) and not isinstance(vars(base)[k], _Delegated):
+                setattr(cls, k, vars(base)[k])
+                break
+        else:
+            setattr(cls, k, property(lambda self, k=k: self.__dict__[k]))
+    return cls
 
 
 class DocumentedField(DocumentedType):
@@ -364,6 +457,11 @@ class DocumentedField(DocumentedType):
     typedef: FieldMember
     typ: ResolvedType  # making this a generic yields MRO resolution issues
 
+    # Wrapper classes are shared between fields of the same type class and
+    # ``typedef`` is not compared, so distinct fields must not compare equal.
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
     def __init__(self, typ: ResolvedType, *, typedef: FieldMember):
         """
         Dynamically subclass ``typ``. For a weak justification
@@ -371,19 +469,13 @@ class DocumentedField(DocumentedType):
         """
         DocumentedType.__init__(self, typedef=typedef)
         object.__setattr__(self, "typ", typ)
-        object.__setattr__(
-            self, "__orig_attrs", tuple(x for x in dir(self) if not x.startswith("__"))
-        )
+        self.__class__ = _wrapper_class(self, typ, "typ", suffix="Field")
 
-        self.__class__ = type(
-            typ.__class__.__name__ + "Field",
-            (self.__class__, typ.__class__),
-            {},
-        )
-
-    def __getattribute__(self, k):
-        if k.startswith("__") or k in object.__getattribute__(self, "__orig_attrs"):
-            return object.__getattribute__(self, k)
+    def __getattr__(self, k):
+        # Only reached for attributes the wrapped instance did not expose
+        # when the wrapper class was synthesized
+        if k.startswith("__"):
+            raise AttributeError(k)
         return getattr(self.typ, k)
 
     def substitute_typevars(self, typevars: dict[str, ResolvedType]) -> Self:
@@ -418,26 +510,48 @@ class DocumentedField(DocumentedType):
 @dataclass(frozen=True)
 class FunctionType(ResolvedType):
     kind: TypeKind = field(init=False, repr=False, default=TypeKind.FUNCTION)
-    params: tuple[tuple[str | None, ResolvedType], ...]
+    # Parameter names and types are stored separately, but index-aligned
+    param_names: tuple[str | None, ...]
+    param_types: tuple[ResolvedType, ...]
     rets: ResolvedType | None = None  # multiple returns are modeled via tuples
 
+    @property
+    def params(self) -> tuple[tuple[str | None, ResolvedType], ...]:
+        """
+        ``(name, type)`` pairs of all parameters.
+        """
+        return tuple(zip(self.param_names, self.param_types))
+
+    @cached_property
+    def _has_typevars(self) -> bool:
+        return any(typ._has_typevars for typ in self.param_types) or bool(
+            self.rets and self.rets._has_typevars
+        )
+
     def substitute_typevars(self, typevars: dict[str, ResolvedType]) -> Self:
-        params = tuple(
-            (param[0], param[1].substitute_typevars(typevars)) for param in self.params
+        if not self._has_typevars:
+            return self
+        param_types = tuple(
+            typ.substitute_typevars(typevars) for typ in self.param_types
         )
         rets = self.rets and self.rets.substitute_typevars(typevars) or None
-        return replace(self, params=params, rets=rets)
+        return replace(self, param_types=param_types, rets=rets)
 
     def is_void(self) -> bool:
         return self.rets is None
 
     def __str__(self) -> str:
+        # Types are immutable and rendered repeatedly
+        return self._str
+
+    @cached_property
+    def _str(self) -> str:
         rendered_params = [
-            (f"{param[0]}: {param[1]}" if param[0] is not None else str(param[1]))
-            if not isinstance(param[1], VariadicType)
-            or not isinstance(param[1].element_type, AnyType)
+            (f"{name}: {typ}" if name is not None else str(typ))
+            if not isinstance(typ, VariadicType)
+            or not isinstance(typ.element_type, AnyType)
             else "..."  # render fun(foo: integer, ...) the same way (doesn't work in tuples, where it requires [integer, any ...])
-            for param in self.params
+            for name, typ in zip(self.param_names, self.param_types)
         ]
         rend = f"fun({', '.join(rendered_params)})"
         if self.rets:
@@ -448,7 +562,7 @@ class FunctionType(ResolvedType):
         name = type(self).__name__.replace("Type", "")
         params = ", ".join(
             ": ".join((name, f"[{repr(typ)}]") if name else (f"[{repr(typ)}]",))
-            for name, typ in self.params
+            for name, typ in zip(self.param_names, self.param_types)
         )
         ret = ""
         if self.rets:
@@ -462,14 +576,14 @@ class FunctionType(ResolvedType):
         Get all referenced struct types.
         """
         ret = set()
-        for param in self.params:
-            ret = ret.union(param[1].refs())
+        for typ in self.param_types:
+            ret = ret.union(typ.refs())
         if self.rets is not None:
             ret = ret.union(self.rets.refs())
         return ret
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DocumentedParameter:
     name: str | None
     desc: str | None
@@ -477,22 +591,37 @@ class DocumentedParameter:
     orig_typ: str | None
 
 
+class LazyOverloads(Sequence[ResolvedType]):
+    """
+    Read-only sequence of function overloads.
+    Signatures are only parsed when they are accessed,
+    checking whether there are any does not need to parse them.
+    """
+
+    def __init__(self, parser: Lark, signatures: list[str]):
+        self._parser = parser
+        self._signatures = signatures
+        self._parsed: list[ResolvedType | None] = [None] * len(signatures)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if (res := self._parsed[idx]) is None:
+            res = self._parsed[idx] = self._parser.parse(self._signatures[idx])
+        return res
+
+    def __iter__(self) -> Iterator[ResolvedType]:
+        for i in range(len(self._signatures)):
+            yield self[i]
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+
 @dataclass(frozen=True)
 class DocumentedFunction(FunctionType, DocumentedType):
     typedef: FnMember = field(repr=False, compare=False, kw_only=True)
     typevar_ctx: dict[str, str | None] | None = None
-    _generics: tuple[tuple[str, str | None]] = field(
-        init=False, repr=False, compare=False, default=None
-    )
-    _returns: list[DocumentedParameter] = field(
-        init=False, repr=False, compare=False, default=None
-    )
-    _parameters: list[DocumentedParameter] = field(
-        init=False, repr=False, compare=False, default=None
-    )
-    _overloads: list[FunctionType] = field(
-        init=False, repr=False, compare=False, default=None
-    )
 
     @property
     def name(self) -> str:
@@ -518,79 +647,51 @@ class DocumentedFunction(FunctionType, DocumentedType):
     def nodiscard_message(self) -> str | None:
         return self.typedef.nodiscard_message
 
-    @property
+    @cached_property
     def generics(self) -> tuple[tuple[str, str | None]]:
-        if not self._generics:
-            object.__setattr__(
-                self,
-                "_generics",
-                tuple(
-                    (generic.name, generic.base) for generic in self.typedef.generics
-                ),
-            )
-        return self._generics
+        return tuple((generic.name, generic.base) for generic in self.typedef.generics)
 
-    @property
-    def overloads(self) -> tuple[tuple[str, str | None]]:
-        if not self._overloads:
-            object.__setattr__(
-                self,
-                "_overloads",
-                tuple(map(self.parser.parse, self.typedef.overloads)),
-            )
-        return self._overloads
+    @cached_property
+    def overloads(self) -> "LazyOverloads":
+        return LazyOverloads(self.parser, self.typedef.overloads)
 
-    @property
+    @cached_property
     def parameters(self) -> list[DocumentedParameter]:
-        if not self._parameters:
-            ret = []
-            for param in self.typedef.params:
-                ret.append(
-                    {
-                        "name": param.name,
-                        "desc": param.desc,
-                        "orig_typ": param.typ,
-                    }
+        ret = []
+        for param, name, typ in zip(
+            self.typedef.params, self.param_names, self.param_types, strict=True
+        ):
+            assert not name or name == param.name
+            ret.append(
+                DocumentedParameter(
+                    name=param.name, desc=param.desc, typ=typ, orig_typ=param.typ
                 )
-            for i, param in enumerate(self.params):
-                assert not param[0] or param[0] == ret[i]["name"]
-                ret[i]["typ"] = param[1]
-            object.__setattr__(
-                self, "_parameters", list(map(lambda x: DocumentedParameter(**x), ret))
             )
-        return self._parameters
+        return ret
 
-    @property
+    @cached_property
     def returns(self) -> list[DocumentedParameter]:
-        if not self._returns:
-            ret = []
-            try:
-                if self.rets is not None:
-                    for param in self.typedef.returns:
-                        ret.append(
-                            {
-                                "name": param.name,
-                                "desc": param.desc,
-                                "orig_typ": param.typ,
-                            }
-                        )
-                    # An error that happens in parsing is that a tuple is
-                    # misinterpreted as multiple returns (because they are
-                    # dumped in parentheses instead of brackets for some reason).
-                    # Since we have the proper type declaration, fix it here
-                    if self.rets.kind != TypeKind.TUPLE or len(ret) != len(
-                        self.rets.elements
-                    ):
-                        ret[0]["typ"] = self.rets
-                    else:
-                        for i, rettyp in enumerate(self.rets.elements):
-                            ret[i]["typ"] = rettyp
-                object.__setattr__(
-                    self, "_returns", list(map(lambda x: DocumentedParameter(**x), ret))
-                )
-            except AttributeError as err:
-                raise RuntimeError(err) from err
-        return self._returns
+        if self.rets is None:
+            return []
+        try:
+            # An error that happens in parsing is that a tuple is
+            # misinterpreted as multiple returns (because they are
+            # dumped in parentheses instead of brackets for some reason).
+            # Since we have the proper type declaration, fix it here
+            if self.rets.kind != TypeKind.TUPLE or len(self.typedef.returns) != len(
+                self.rets.elements
+            ):
+                types = (self.rets,)
+            else:
+                types = self.rets.elements
+        except AttributeError as err:
+            raise RuntimeError(err) from err
+        return [
+            DocumentedParameter(
+                name=param.name, desc=param.desc, typ=typ, orig_typ=param.typ
+            )
+            for param, typ in zip(self.typedef.returns, types, strict=True)
+        ]
 
     def __repr__(self) -> str:
         name = type(self).__name__.replace("Type", "")
@@ -631,21 +732,21 @@ class DocumentedFunction(FunctionType, DocumentedType):
         and hydrates all string-valued types into objects that
         can be used to render documentation where it matters.
         """
-        params = []
+        param_names = []
+        param_types = []
         for param in member.params:
+            param_names.append(param.name)
             try:
-                params.append(
-                    (param.name, param.typ and parser.parse(param.typ) or None)
-                )
+                param_types.append(param.typ and parser.parse(param.typ) or None)
             except (UnexpectedCharacters, UnexpectedToken):
                 # TODO:  log, most likely omitted function args/rets
-                params.append((param.name, UnknownType()))
+                param_types.append(UNKNOWN)
         rets = []
         for ret in member.returns:
             try:
                 rets.append(ret.typ and parser.parse(ret.typ) or None)
             except (UnexpectedCharacters, UnexpectedToken):
-                rets.append(UnknownType())
+                rets.append(UNKNOWN)
         if len(rets) == 1:
             rets = rets[0]
             if isinstance(rets, NilType):
@@ -654,7 +755,8 @@ class DocumentedFunction(FunctionType, DocumentedType):
         else:
             rets = TupleType(tuple(rets), parser=parser)
         result = cls(
-            params=params,
+            param_names=tuple(param_names),
+            param_types=tuple(param_types),
             rets=rets,
             parser=parser,
             typedef=member,
@@ -665,6 +767,37 @@ class DocumentedFunction(FunctionType, DocumentedType):
         return result
 
 
+# Hydrate raw members by their exact type, others are passed through
+_MEMBER_HYDRATORS = {
+    FnMember: DocumentedFunction.from_member,
+    FieldMember: DocumentedField.from_member,
+}
+
+
+def _hydrate_members(
+    parser: Lark,
+    members: Mapping[str, FnMember | FieldMember],
+    typevar_ctx: dict[str, str | None] | None = None,
+    *,
+    into: dict[str, DocumentedFunction | DocumentedField] | None = None,
+) -> dict[str, DocumentedFunction | DocumentedField]:
+    """
+    Hydrate the members of a class definition.
+
+    Args:
+        parser: Parser to resolve member types with
+        members: Mapping of member name to raw member
+        typevar_ctx: Type arguments to substitute in member types
+        into: Add the hydrated members to this dict (overriding existing ones)
+              instead of a new one. Used to overlay inherited members.
+    """
+    res = {} if into is None else into
+    hydrators = _MEMBER_HYDRATORS
+    for name, member in members.items():
+        res[name] = hydrators[type(member)](parser, member, typevar_ctx)
+    return res
+
+
 @dataclass(frozen=True)
 class StructType(ResolvedType):
     """
@@ -678,23 +811,16 @@ class StructType(ResolvedType):
         kw_only=True, default=None, compare=False, repr=False
     )
 
-    _generics: tuple[tuple[str, str | None]] = field(
-        init=False, repr=False, compare=False, default=None
-    )
-    _members: dict[str, DocumentedFunction | DocumentedField] = field(
-        init=False, repr=False, compare=False, default=None
-    )
-    _funs: dict[str, DocumentedFunction] = field(
-        init=False, repr=False, compare=False, default=None
-    )
-    _fields: dict[str, DocumentedField] = field(
-        init=False, repr=False, compare=False, default=None
-    )
+    @cached_property
+    def _has_typevars(self) -> bool:
+        # Without a definition, this might be a typevar itself
+        return not self.typedef or bool(self.is_generic)
 
     def substitute_typevars(self, typevars: dict[str, ResolvedType]) -> ResolvedType:
         if not self.typedef and self.name in typevars:
-            # => this unknown "struct" is a generic type variable
-            return deepcopy(typevars[self.name])
+            # => this unknown "struct" is a generic type variable.
+            # Types are immutable, no need to copy it.
+            return typevars[self.name]
         return self
 
     @property
@@ -707,78 +833,55 @@ class StructType(ResolvedType):
             return None  # don't know without definition
         return bool(self.typedef.generics)
 
-    @property
+    @cached_property
     def generics(self) -> tuple[tuple[str, str | None]]:
         if not self.typedef:
-            return []
-        if not self._generics:
-            object.__setattr__(
-                self,
-                "_generics",
-                tuple(
-                    (generic.name, generic.base) for generic in self.typedef.generics
-                ),
-            )
-        return self._generics
+            return ()
+        return tuple((generic.name, generic.base) for generic in self.typedef.generics)
 
-    @property
+    @cached_property
     def members(self) -> dict[str, DocumentedFunction | DocumentedField]:
         if not self.typedef:
             return {}
-        if not self._members:
-            # FIXME: Overloads from meta are dumped as separate functions with same name
-            object.__setattr__(
-                self,
-                "_members",
-                {
-                    member.name: DocumentedFunction.from_member(self.parser, member)
-                    if isinstance(member, FnMember)
-                    else DocumentedField.from_member(self.parser, member)
-                    if isinstance(member, FieldMember)
-                    else member
-                    for member in self.typedef.members
-                },
-            )
-        return self._members
+        # FIXME: Overloads from meta are dumped as separate functions with same name
+        return {
+            member.name: hydrate(self.parser, member)
+            if (hydrate := _MEMBER_HYDRATORS.get(type(member)))
+            else member
+            for member in self.typedef.members
+        }
 
-    @property
-    def funs(self) -> dict[str, DocumentedFunction]:
+    @cached_property
+    def _member_kinds(
+        self,
+    ) -> tuple[dict[str, DocumentedFunction], dict[str, DocumentedField]]:
+        """
+        Partition members into functions and fields in a single pass.
+        """
+        funs, fields = {}, {}
+        if not self.typedef:
+            return funs, fields
         try:
-            if not self.typedef:
-                return {}
-            if not self._funs:
-                # FIXME: Overloads from meta are dumped as separate functions with same name
-                object.__setattr__(
-                    self,
-                    "_funs",
-                    {
-                        name: member
-                        for name, member in self.members.items()
-                        if isinstance(member, DocumentedFunction)
-                    },
-                )
-            return self._funs
+            for name, member in self.members.items():
+                if isinstance(member, DocumentedFunction):
+                    funs[name] = member
+                elif isinstance(member, DocumentedField):
+                    fields[name] = member
         except AttributeError as err:
             # @property raising an AttributeError is treated like
             # undefined property, which falls back to __getattr__, if defined.
             # This makes debugging very hard since the initial error is suppressed.
             raise RuntimeError(err) from err
+        return funs, fields
+
+    @property
+    def funs(self) -> dict[str, DocumentedFunction]:
+        # FIXME: Overloads from meta are dumped as separate functions with same name
+        return self._member_kinds[0]
 
     @property
     def fields(self) -> dict[str, DocumentedField]:
-        if not self.typedef:
-            return {}
-        if not self._fields:
-            object.__setattr__(
-                self,
-                "_fields",
-                {
-                    name: member
-                    for name, member in self.members.items()
-                    if isinstance(member, DocumentedField)
-                },
-            )
-        return self._fields
+        return self._member_kinds[1]
 
     def refs(self) -> set[ResolvedType]:
         """
@@ -831,43 +934,19 @@ class ClassType(StructType, DocumentedType):
 
     kind: TypeKind = field(init=False, repr=False, default=TypeKind.CLASS)
     typedef: Class = field(kw_only=True, repr=False, compare=False)
-    _bases: list["StructType"] = field(
-        init=False, repr=False, compare=False, default=None
-    )
 
-    @property
+    @cached_property
     def bases(self) -> list["StructType"]:
-        if not self._bases:
-            object.__setattr__(
-                self, "_bases", [self.parser.parse(base) for base in self.typedef.bases]
-            )
-        return self._bases
+        return [self.parser.parse(base) for base in self.typedef.bases]
 
-    @property
+    @cached_property
     def members(self) -> dict[str, DocumentedFunction | DocumentedField]:
-        if not self._members:
-            attrs = {}
-            # Ensure inheritance is resolved correctly by reversing priority
-            for base in reversed(self.bases):
-                if not hasattr(base, "members"):
-                    continue
-                for name, member in base.members.items():
-                    attrs[name] = member
-            for name, member in self.typedef.members.items():
-                attrs[name] = member
-            object.__setattr__(
-                self,
-                "_members",
-                {
-                    name: DocumentedFunction.from_member(self.parser, member)
-                    if isinstance(member, FnMember)
-                    else DocumentedField.from_member(self.parser, member)
-                    if isinstance(member, FieldMember)
-                    else member
-                    for name, member in attrs.items()
-                },
-            )
-        return self._members
+        members = {}
+        # Ensure inheritance is resolved correctly by reversing priority.
+        # Inherited members are already resolved.
+        for base in reversed(self.bases):
+            members |= getattr(base, "members", {})
+        return _hydrate_members(self.parser, self.typedef.members, into=members)
 
     def substitute_typevars(
         self, typevars: dict[str, ResolvedType]
@@ -896,24 +975,21 @@ class AliasType(StructType, DocumentedType):
 
     kind: TypeKind = field(init=False, repr=False, default=TypeKind.ALIAS)
     typedef: Alias = field(kw_only=True, compare=False, repr=False)
-    typ: ResolvedType = field(init=False, compare=False)
 
     def __getattr__(self, k: str):
-        if k.startswith("__"):
+        # `typ` itself is only looked up here if resolving it failed
+        if k.startswith("__") or k == "typ":
             raise AttributeError(k)
         return getattr(self.typ, k)
 
-    def __post_init__(self):
-        # making a @property out of this means not being able to show it in repr without hacks
-        # Need to circumvent frozen (__hash__ is neeeded to be able to use types in table keys)
-        # but this should be fine since `typ` is not used for equality check
-        object.__setattr__(self, "typ", self.parser.parse(self.typedef.typ))
+    @cached_property
+    def typ(self) -> ResolvedType:
+        # Parsed lazily, most aliases in an index are never rendered
+        return self.parser.parse(self.typedef.typ)
 
-    @property
+    @cached_property
     def members(self) -> dict[str, DocumentedFunction | DocumentedField]:
-        if not self._members:
-            object.__setattr__(self, "_members", getattr(self.typ, "members", {}))
-        return self._members
+        return getattr(self.typ, "members", {})
 
     def member_refs(self, visited: set[str] | None = None) -> set[ResolvedType]:
         """
@@ -996,7 +1072,7 @@ class TableType(ResolvedType):
     _fields: tuple[tuple[str | ResolvedType | None, ResolvedType], ...]
     omitted: bool = False
 
-    @property
+    @cached_property
     def fields(self) -> dict[str | ResolvedType | int, ResolvedType]:
         ret = {}
         num = 1
@@ -1008,31 +1084,45 @@ class TableType(ResolvedType):
                 ret[k] = v
         return ret
 
+    @cached_property
+    def _has_typevars(self) -> bool:
+        return any(
+            (isinstance(k, ResolvedType) and k._has_typevars) or v._has_typevars
+            for k, v in self._fields
+        )
+
     def substitute_typevars(self, typevars) -> Self:
+        if not self._has_typevars:
+            return self
         fields = tuple(
             (
-                field[0].substitute_typevars(typevars)
-                if isinstance(field[0], ResolvedType)
-                else field[0],
-                field[1].substitute_typevars(typevars)
-                if isinstance(field[1], ResolvedType)
-                else field[1],
+                key.substitute_typevars(typevars)
+                if isinstance(key, ResolvedType)
+                else key,
+                val.substitute_typevars(typevars),
             )
+            for key, val in self._fields
         )
-        return replace(self, fields=fields)
+        return replace(self, _fields=fields)
 
     def __str__(self) -> str:
-        if not self.fields:
+        return self._str
+
+    @cached_property
+    def _str(self) -> str:
+        fields = self.fields
+        if not fields:
             if self.omitted:
                 return "{...}"
             return "{}"
-        rendered = [
-            f"{key}: {val}" for key, val in self.fields.items() if isinstance(key, str)
-        ] + [
-            f"[{key}]: {val}"
-            for key, val in self.fields.items()
-            if isinstance(key, ResolvedType)
-        ]
+        # Named fields are rendered before typed ones
+        rendered, typed = [], []
+        for key, val in fields.items():
+            if isinstance(key, str):
+                rendered.append(f"{key}: {val}")
+            elif isinstance(key, ResolvedType):
+                typed.append(f"[{key}]: {val}")
+        rendered += typed
         if self.omitted:
             rendered.append("...")
         return f"{{ {', '.join(rendered)} }}"
@@ -1055,11 +1145,21 @@ class UnionType(ResolvedType):
     elements: tuple[ResolvedType, ...]
     omitted: bool = False
 
+    @cached_property
+    def _has_typevars(self) -> bool:
+        return any(el._has_typevars for el in self.elements)
+
     def substitute_typevars(self, typevars) -> Self:
+        if not self._has_typevars:
+            return self
         elements = tuple(el.substitute_typevars(typevars) for el in self.elements)
         return replace(self, elements=elements)
 
     def __str__(self) -> str:
+        return self._str
+
+    @cached_property
+    def _str(self) -> str:
         rendered = list(map(str, self.elements))
         return f"({'|'.join(rendered)}{'...' if self.omitted else ''})"
 
@@ -1087,30 +1187,37 @@ class IntersectionType(ResolvedType):
     omitted: bool = False
 
     @property
-    def members(self) -> dict[str, DocumentedFunction | DocumentedField]:
-        res = {}
-        for el in self.elements:
-            try:
-                res |= el.members
-            except AttributeError:
-                pass
-        return res
+    def members(self) -> ChainMap[str, DocumentedFunction | DocumentedField]:
+        # Later elements take precedence
+        return ChainMap(
+            *(
+                m
+                for el in reversed(self.elements)
+                if (m := getattr(el, "members", None))
+            )
+        )
 
     @property
-    def fields(self) -> dict[str, DocumentedField]:
-        res = {}
-        for el in self.elements:
-            try:
-                res |= el.fields
-            except AttributeError:
-                pass
-        return res
+    def fields(self) -> ChainMap[str, DocumentedField]:
+        return ChainMap(
+            *(f for el in reversed(self.elements) if (f := getattr(el, "fields", None)))
+        )
+
+    @cached_property
+    def _has_typevars(self) -> bool:
+        return any(el._has_typevars for el in self.elements)
 
     def substitute_typevars(self, typevars) -> Self:
+        if not self._has_typevars:
+            return self
         elements = tuple(el.substitute_typevars(typevars) for el in self.elements)
         return replace(self, elements=elements)
 
     def __str__(self) -> str:
+        return self._str
+
+    @cached_property
+    def _str(self) -> str:
         rendered = list(map(str, self.elements))
         return f"({' & '.join(rendered)}{'...' if self.omitted else ''})"
 
@@ -1136,11 +1243,21 @@ class TupleType(ResolvedType):
     kind: TypeKind = field(init=False, repr=False, default=TypeKind.TUPLE)
     elements: tuple[ResolvedType, ...]
 
+    @cached_property
+    def _has_typevars(self) -> bool:
+        return any(el._has_typevars for el in self.elements)
+
     def substitute_typevars(self, typevars) -> Self:
+        if not self._has_typevars:
+            return self
         elements = tuple(el.substitute_typevars(typevars) for el in self.elements)
         return replace(self, elements=elements)
 
     def __str__(self) -> str:
+        return self._str
+
+    @cached_property
+    def _str(self) -> str:
         rendered = list(map(str, self.elements))
         return f"({','.join(rendered)})"
 
@@ -1186,7 +1303,8 @@ class GenericStructInstanceType(StructType):
         # FIXME: This doesn't account for non-sequential definitions like table<K, string>
         return len(self.type_args) < len(self.typedef.generics)
 
-    def _typevar_ctx(self):
+    @cached_property
+    def _typevar_ctx(self) -> dict[str, ResolvedType]:
         if not self.typedef:
             return {}
         return {
@@ -1194,27 +1312,17 @@ class GenericStructInstanceType(StructType):
             for generic, typearg in zip(self.typedef.generics, self.type_args)
         }
 
-    @property
+    @cached_property
     def members(self) -> dict[str, DocumentedFunction | DocumentedField]:
         if not self.typedef:
             return {}
-        if not self._members:
-            ctx = self._typevar_ctx()
-            object.__setattr__(
-                self,
-                "_members",
-                {
-                    member.name: DocumentedFunction.from_member(
-                        self.parser, member, ctx
-                    )
-                    if isinstance(member, FnMember)
-                    else DocumentedField.from_member(self.parser, member, ctx)
-                    if isinstance(member, FieldMember)
-                    else member.substitute_typevars(ctx)
-                    for member in self.typedef.members
-                },
-            )
-        return self._members
+        ctx = self._typevar_ctx
+        return {
+            member.name: hydrate(self.parser, member, ctx)
+            if (hydrate := _MEMBER_HYDRATORS.get(type(member)))
+            else member.substitute_typevars(ctx)
+            for member in self.typedef.members
+        }
 
     def __str__(self) -> str:
         rendered = list(map(str, self.type_args))
@@ -1243,45 +1351,23 @@ class GenericClassInstanceType(GenericStructInstanceType, ClassType):
         init=False, repr=False, default=TypeKind.GENERIC_CLASS_INSTANCE
     )
 
-    @property
+    @cached_property
     def bases(self) -> list["StructType"]:
-        if not self._bases:
-            ctx = self._typevar_ctx()
-            object.__setattr__(
-                self,
-                "_bases",
-                [
-                    self.parser.parse(base).substitute_typevars(ctx)
-                    for base in self.typedef.bases
-                ],
-            )
-        return self._bases
+        ctx = self._typevar_ctx
+        return [
+            self.parser.parse(base).substitute_typevars(ctx)
+            for base in self.typedef.bases
+        ]
 
-    @property
+    @cached_property
     def members(self) -> dict[str, DocumentedFunction | DocumentedField]:
-        if not self._members:
-            ctx = self._typevar_ctx()
-            attrs = {}
-            # Ensure inheritance is resolved correctly by reversing priority
-            for base in reversed(self.bases):
-                for name, member in base.members.items():
-                    attrs[name] = member
-            for name, member in self.typedef.members.items():
-                attrs[name] = member
-            object.__setattr__(
-                self,
-                "_members",
-                {
-                    name: DocumentedFunction.from_member(self.parser, member, ctx)
-                    if isinstance(member, FnMember)
-                    else DocumentedField.from_member(self.parser, member, ctx)
-                    if isinstance(member, FieldMember)
-                    # Inherited member from base. Already resolved.
-                    else member
-                    for name, member in attrs.items()
-                },
-            )
-        return self._members
+        ctx = self._typevar_ctx
+        members = {}
+        # Ensure inheritance is resolved correctly by reversing priority.
+        # Inherited members are already resolved.
+        for base in reversed(self.bases):
+            members |= base.members
+        return _hydrate_members(self.parser, self.typedef.members, ctx, into=members)
 
     def __repr__(self):
         return super().__repr__()
@@ -1293,14 +1379,11 @@ class GenericAliasInstanceType(GenericStructInstanceType, AliasType):
         init=False, repr=False, default=TypeKind.GENERIC_ALIAS_INSTANCE
     )
 
-    def __post_init__(self):
-        AliasType.__post_init__(self)
-        GenericStructInstanceType.__post_init__(self)
-        # This type still includes the unresolved generics,
+    @cached_property
+    def typ(self) -> ResolvedType:
+        # The aliased type still includes the unresolved generics,
         # need to substitute our typevars.
-        object.__setattr__(
-            self, "typ", self.typ.substitute_typevars(self._typevar_ctx())
-        )
+        return AliasType.typ.func(self).substitute_typevars(self._typevar_ctx)
 
     def __repr__(self) -> str:
         base = super().__repr__()
@@ -1316,9 +1399,7 @@ class GenericEnumInstanceType(GenericStructInstanceType, EnumType):
     def __post_init__(self):
         EnumType.__post_init__(self)
         GenericStructInstanceType.__post_init__(self)
-        object.__setattr__(
-            self, "typ", self.typ.substitute_typevars(self._typevar_ctx())
-        )
+        object.__setattr__(self, "typ", self.typ.substitute_typevars(self._typevar_ctx))
 
 
 @dataclass(frozen=True)
@@ -1371,6 +1452,14 @@ class LiteralBool(LiteralType):
         return super().__repr__()
 
 
+# Literals don't reference a parser, so they can be shared between all of them
+TRUE = LiteralBool(True)
+FALSE = LiteralBool(False)
+# The same literals tend to recur across many signatures
+_literal_str = lru_cache(maxsize=256)(LiteralStr)
+_literal_int = lru_cache(maxsize=256)(LiteralInt)
+
+
 class OptionalType[T: ResolvedType](ResolvedType):
     kind: TypeKind = TypeKind.OPTIONAL
     inner: T
@@ -1382,19 +1471,16 @@ class OptionalType[T: ResolvedType](ResolvedType):
         This is not a long-running process.
         """
         object.__setattr__(self, "inner", inner)
-        object.__setattr__(
-            self, "__orig_attrs", tuple(x for x in dir(self) if not x.startswith("__"))
-        )
         # An optional type is always optional, we don't need to be able
         # to wrap ourselves, hence we don't need to account for MRO.
         # Assumption: The type parser does its job.
-        self.__class__ = type(
-            "Optional" + inner.__class__.__name__, (self.__class__, inner.__class__), {}
-        )
+        self.__class__ = _wrapper_class(self, inner, "inner", prefix="Optional")
 
-    def __getattribute__(self, k):
-        if k.startswith("__") or k in object.__getattribute__(self, "__orig_attrs"):
-            return object.__getattribute__(self, k)
+    def __getattr__(self, k):
+        # Only reached for attributes the wrapped instance did not expose
+        # when the wrapper class was synthesized
+        if k.startswith("__"):
+            raise AttributeError(k)
         return getattr(self.inner, k)
 
     def __str__(self) -> str:
@@ -1417,6 +1503,10 @@ class OptionalType[T: ResolvedType](ResolvedType):
     def is_optional(self) -> bool:
         return True
 
+    @cached_property
+    def _has_typevars(self) -> bool:
+        return self.inner._has_typevars
+
     def substitute_typevars(self, typevars) -> Self:
         inner = self.inner.substitute_typevars(typevars)
         return OptionalType(inner)
@@ -1432,19 +1522,13 @@ class ArrayType[T: ResolvedType](ResolvedType):
         of this worrying pattern, see ``OptionalType``.
         """
         object.__setattr__(self, "element_type", element_type)
-        object.__setattr__(
-            self, "__orig_attrs", tuple(x for x in dir(self) if not x.startswith("__"))
-        )
-        if isinstance(element_type, ArrayType):
+        self.__class__ = _wrapper_class(
+            self,
+            element_type,
+            "element_type",
+            suffix="List",
             # Avoid MRO resolution issues
-            inherit = (element_type.__class__,)
-        else:
-            inherit = (self.__class__, element_type.__class__)
-
-        self.__class__ = type(
-            element_type.__class__.__name__ + "List",
-            inherit,
-            {},
+            inherit_inner=isinstance(element_type, ArrayType),
         )
         # Don't set self.__dict__ = element_type.__dict__,
         # it introduces cycles and sharing the __dict__ means
@@ -1454,11 +1538,17 @@ class ArrayType[T: ResolvedType](ResolvedType):
         # Still not sure if this is necessary in general,
         # at least for ArrayType. For OptionalType, it makes more sense.
 
-    def __getattribute__(self, k):
-        if k.startswith("__") or k in object.__getattribute__(self, "__orig_attrs"):
-            return object.__getattribute__(self, k)
+    def __getattr__(self, k):
+        # Only reached for attributes the wrapped instance did not expose
+        # when the wrapper class was synthesized
+        if k.startswith("__"):
+            raise AttributeError(k)
         return getattr(self.element_type, k)
 
+    @cached_property
+    def _has_typevars(self) -> bool:
+        return self.element_type._has_typevars
+
     def substitute_typevars(self, typevars) -> Self:
         element_type = self.element_type.substitute_typevars(typevars)
         return ArrayType(element_type)
@@ -1495,20 +1585,21 @@ class VariadicType[T](ResolvedType):
         of this worrying pattern, see ``OptionalType``.
         """
         object.__setattr__(self, "element_type", element_type)
-        object.__setattr__(
-            self, "__orig_attrs", tuple(x for x in dir(self) if not x.startswith("__"))
-        )
-        self.__class__ = type(
-            "Variadic" + element_type.__class__.__name__,
-            (self.__class__, element_type.__class__),
-            {},
+        self.__class__ = _wrapper_class(
+            self, element_type, "element_type", prefix="Variadic"
         )
 
-    def __getattribute__(self, k):
-        if k.startswith("__") or k in object.__getattribute__(self, "__orig_attrs"):
-            return object.__getattribute__(self, k)
+    def __getattr__(self, k):
+        # Only reached for attributes the wrapped instance did not expose
+        # when the wrapper class was synthesized
+        if k.startswith("__"):
+            raise AttributeError(k)
         return getattr(self.element_type, k)
 
+    @cached_property
+    def _has_typevars(self) -> bool:
+        return self.element_type._has_typevars
+
     def substitute_typevars(self, typevars) -> Self:
         # NOTE: Unsure whether it should replace itself with the element
         # in case it got replaced (at least if it was a StructType) or not.
@@ -1532,8 +1623,13 @@ class VariadicType[T](ResolvedType):
         return self.element_type.refs()
 
 
+# Variadics of primitives don't carry any state either, ``...`` is very common.
+VARIADIC_ANY = VariadicType(ANY)
+VARIADIC_UNKNOWN = VariadicType(UNKNOWN)
+
+
 class ArrayOmissionMarker:
-    pass
+    __slots__ = ()
 
 
 class TreeHydrator(Transformer):
@@ -1547,62 +1643,85 @@ class TreeHydrator(Transformer):
         self.aliases: dict[str, Alias] = index.aliases
         self.enums: dict[str, LuaEnum] = index.enums
         self.index: dict[str, LuaType] = index.types
+        # Resolve names with a single lookup. Only the names are collected,
+        # the index validates entries lazily when they are accessed.
+        self._named: dict[str, tuple[type[StructType], Mapping[str, Property]]] = {}
+        for typ, defs in (
+            (EnumType, self.enums),
+            (AliasType, self.aliases),
+            (ClassType, self.classes),
+        ):
+            self._named |= dict.fromkeys(defs, (typ, defs))
+        # Hydrated types are immutable, named ones are shared between all
+        # type strings that reference them.
+        self._structs: dict[str, StructType] = {}
+        self._generic_structs: dict[
+            tuple[str, tuple[ResolvedType, ...]], StructType
+        ] = {}
 
     def union_type(
-        self, items: list[ResolvedType], *, omitted: bool = False
+        self, items: list[ResolvedType | Token | None]
     ) -> UnionType | OptionalType:
+        *items, dots = items
+        omitted = dots is not None
         if len(items) == 1:
             return items[0]
         # Flatten unions of unions. Emmylua does that automatically though.
-        all_members = []
+        # Only copy the elements once a nested union is encountered.
+        flat = None
         optional = False
-        for sub in items:
+        for i, sub in enumerate(items):
             if isinstance(sub, UnionType):
-                all_members.extend(sub.elements)
+                if flat is None:
+                    flat = items[:i]
+                flat.extend(sub.elements)
                 omitted = omitted or sub.omitted
             elif isinstance(sub, OptionalType):
+                if flat is None:
+                    flat = items[:i]
                 optional = True
-                all_members.append(sub.inner)
-            else:
-                all_members.append(sub)
-        union = UnionType(tuple(all_members), omitted=omitted, parser=self.parser)
+                flat.append(sub.inner)
+            elif flat is not None:
+                flat.append(sub)
+        union = UnionType(
+            tuple(items if flat is None else flat), omitted=omitted, parser=self.parser
+        )
         if optional:
             return OptionalType(union, parser=self.parser)
         return union
 
-    def union_type_omitted(self, items: list[ResolvedType]) -> UnionType | OptionalType:
-        return self.union_type(items, omitted=True)
-
     def intersection_type(
-        self, items: list[ResolvedType], *, omitted: bool = False
+        self, items: list[ResolvedType | Token | None]
     ) -> IntersectionType:
+        *items, dots = items
+        omitted = dots is not None
         if len(items) == 1:
             return items[0]
         # Flatten intersections of intersections. Emmylua does that automatically though.
-        all_members = []
-        for sub in items:
+        flat = None
+        for i, sub in enumerate(items):
             if isinstance(sub, IntersectionType):
-                all_members.extend(sub.elements)
+                if flat is None:
+                    flat = items[:i]
+                flat.extend(sub.elements)
                 omitted = omitted or sub.omitted
-            else:
-                all_members.append(sub)
-        return IntersectionType(tuple(all_members), omitted=omitted, parser=self.parser)
-
-    def intersection_type_omitted(self, items: list[ResolvedType]) -> IntersectionType:
-        return self.intersection_type(items, omitted=True)
+            elif flat is not None:
+                flat.append(sub)
+        return IntersectionType(
+            tuple(items if flat is None else flat), omitted=omitted, parser=self.parser
+        )
 
-    @v_args(inline=True)
-    def optional_type(self, inner: ResolvedType) -> OptionalType:
+    def optional_type(self, children: list[ResolvedType]) -> OptionalType:
+        inner = children[0]
         if isinstance(inner, OptionalType):
             return inner
         return OptionalType(inner, parser=self.parser)
 
-    @v_args(inline=True)
-    def array_type(self, element: ResolvedType) -> ArrayType:
-        return ArrayType(element, parser=self.parser)
+    def array_type(self, children: list[ResolvedType]) -> ArrayType:
+        return ArrayType(children[0], parser=self.parser)
 
     def type_list(self, items: list[ResolvedType]) -> list[ResolvedType]:
-        return list(items)
+        return items
 
     def table_type(
         self,
@@ -1610,123 +1729,122 @@ class TreeHydrator(Transformer):
             tuple[str | ResolvedType | None, ResolvedType | ArrayOmissionMarker]
         ],
     ) -> TableType:
-        if any(isinstance(field[1], ArrayOmissionMarker) for field in items):
-            return TableType(
-                tuple(
-                    field
-                    for field in items
-                    if not isinstance(field[1], ArrayOmissionMarker)
-                ),
-                parser=self.parser,
-                omitted=True,
-            )
+        fields = []
+        omitted = False
+        for item in items:
+            if isinstance(item[1], ArrayOmissionMarker):
+                omitted = True
+            else:
+                fields.append(item)
+        if omitted:
+            return TableType(tuple(fields), parser=self.parser, omitted=True)
         return TableType(tuple(items), parser=self.parser)
 
-    @v_args(inline=True)
     def array_named_field(
-        self, name_token: Token, field_type: ResolvedType
+        self, children: list[Token | ResolvedType]
     ) -> tuple[str, ResolvedType]:
+        name_token, field_type = children
         return (name_token.value, field_type)
 
-    @v_args(inline=True)
     def array_typed_field(
-        self, key_type: ResolvedType, value_type: ResolvedType
+        self, children: list[ResolvedType]
     ) -> tuple[ResolvedType, ResolvedType]:
+        key_type, value_type = children
         return (key_type, value_type)
 
     def array_omission(self, _) -> tuple[None, ArrayOmissionMarker]:
         return (None, ArrayOmissionMarker())
 
-    @v_args(inline=True)
     def function_void_type(
-        self, params: list[tuple[str | None, ResolvedType]]
+        self, children: list[list[tuple[str | None, ResolvedType]] | None]
     ) -> FunctionType:
-        return FunctionType(tuple(params or []), None, parser=self.parser)
+        params = children[0]
+        if not params:
+            return FunctionType((), (), None, parser=self.parser)
+        names, types = zip(*params)
+        return FunctionType(names, types, None, parser=self.parser)
 
-    @v_args(inline=True)
     def function_ret_type(
-        self, function_void: FunctionType, returns: ResolvedType
+        self, children: list[FunctionType | ResolvedType]
     ) -> FunctionType:
-        return FunctionType(function_void.params, returns, parser=self.parser)
+        function_void, returns = children
+        return FunctionType(
+            function_void.param_names,
+            function_void.param_types,
+            returns,
+            parser=self.parser,
+        )
 
     def param_list(
         self, params: list[tuple[str | None, ResolvedType]]
     ) -> list[tuple[str | None, ResolvedType]]:
-        return list(params)
+        return params
 
-    @v_args(inline=True)
     def named_param(
-        self, name_token: Token, param_type: ResolvedType | Token
+        self, children: list[Token | ResolvedType]
     ) -> tuple[str, ResolvedType]:
+        name_token, param_type = children
         if isinstance(param_type, Token):
             assert param_type.value == "..."
-            return (
-                name_token.value,
-                VariadicType(AnyType(), parser=self.parser),
-            )
+            return (name_token.value, VARIADIC_ANY)
         return (name_token.value, param_type)
 
-    @v_args(inline=True)
     def unnamed_param(
-        self, param_type: ResolvedType | Token
+        self, children: list[ResolvedType | Token]
     ) -> tuple[None, ResolvedType]:
+        param_type = children[0]
         if isinstance(param_type, Token):
             assert param_type.value == "..."
-            return (None, VariadicType(AnyType(), parser=self.parser))
+            return (None, VARIADIC_ANY)
         return (None, param_type)
 
-    @v_args(inline=True)
-    def tuple_type(self, items: list[ResolvedType]) -> TupleType:
-        return TupleType(tuple(items), parser=self.parser)
+    def tuple_type(self, children: list[list[ResolvedType]]) -> TupleType:
+        return TupleType(tuple(children[0]), parser=self.parser)
 
-    @v_args(inline=True)
-    def string_literal(self, token: Token) -> LiteralType:
-        value = token.value[1:-1]
-        return LiteralStr(value)
+    def string_literal(self, children: list[Token]) -> LiteralType:
+        value = children[0].value[1:-1]
+        return _literal_str(value)
 
-    @v_args(inline=True)
-    def integer_literal(self, token: Token) -> LiteralType:
-        value = int(token.value)
-        return LiteralInt(value)
+    def integer_literal(self, children: list[Token]) -> LiteralType:
+        value = int(children[0].value)
+        return _literal_int(value)
 
-    @v_args(inline=True)
-    def literal_true(self) -> LiteralType:
-        return LiteralBool(True)
+    def literal_true(self, _) -> LiteralType:
+        return TRUE
 
-    @v_args(inline=True)
-    def literal_false(self) -> LiteralType:
-        return LiteralBool(False)
+    def literal_false(self, _) -> LiteralType:
+        return FALSE
 
-    @v_args(inline=True)
-    def variadic_type(self, element: ResolvedType) -> VariadicType:
-        return VariadicType(element, parser=self.parser)
+    def variadic_type(self, children: list[ResolvedType]) -> VariadicType:
+        return VariadicType(children[0], parser=self.parser)
 
-    @v_args(inline=True)
-    def complex_variadic_type(self) -> VariadicType:
-        return VariadicType(UnknownType(), parser=self.parser)
+    def complex_variadic_type(self, _) -> VariadicType:
+        return VARIADIC_UNKNOWN
 
     def struct_type(
         self, namespace_parts: list[Token]
     ) -> ClassType | AliasType | EnumType | StructType:
         full_name = ".".join(p.value for p in namespace_parts)
-        if full_name in self.classes:
-            return ClassType(
-                full_name, typedef=self.classes[full_name], parser=self.parser
-            )
-        if full_name in self.aliases:
-            return AliasType(
-                full_name, typedef=self.aliases[full_name], parser=self.parser
-            )
-        if full_name in self.enums:
-            return EnumType(
-                full_name, typedef=self.enums[full_name], parser=self.parser
-            )
-        # Unknown class
-        return StructType(full_name, parser=self.parser)
+        structs = self._structs
+        try:
+            return structs[full_name]
+        except KeyError:
+            pass
+        res = structs[full_name] = self._resolve_struct(full_name)
+        return res
+
+    def _resolve_struct(
+        self, full_name: str
+    ) -> ClassType | AliasType | EnumType | StructType:
+        try:
+            typ, defs = self._named[full_name]
+        except KeyError:
+            # Unknown class
+            return StructType(full_name, parser=self.parser)
+        return typ(full_name, typedef=defs[full_name], parser=self.parser)
 
-    @v_args(inline=True)
     def generic_struct_type(
-        self, base: StructType, type_args: list[ResolvedType]
+        self, children: list[StructType | list[ResolvedType]]
     ) -> (
         GenericClassInstanceType
         | GenericAliasInstanceType
@@ -1737,6 +1855,19 @@ class TreeHydrator(Transformer):
         | EnumType
         | StructType
     ):
+        base, type_args = children
+        key = (base.name, tuple(type_args))
+        generic_structs = self._generic_structs
+        try:
+            return generic_structs[key]
+        except KeyError:
+            pass
+        res = generic_structs[key] = self._instantiate_struct(base, type_args)
+        return res
+
+    def _instantiate_struct(
+        self, base: StructType, type_args: list[ResolvedType]
+    ) -> StructType:
         # Since we're just parsing strings here, we need to investigate a bit
         # if we can decide whether we got a Container<string,boolean>,
         # Container<string, T> or Container<T, K>. For the latter,
@@ -1761,66 +1892,89 @@ class TreeHydrator(Transformer):
 
         # We got at least one typevar
         if isinstance(base, ClassType):
-            return GenericClassInstanceType(
-                base.name, tuple(type_args), typedef=base.typedef, parser=self.parser
-            )
-        if isinstance(base, AliasType):
-            return GenericAliasInstanceType(
-                base.name, tuple(type_args), typedef=base.typedef, parser=self.parser
-            )
-        if isinstance(base, EnumType):
-            return GenericEnumInstanceType(
-                base.name, tuple(type_args), typedef=base.typedef, parser=self.parser
-            )
-        # fallback, shouldn't happen
-        return GenericStructInstanceType(
+            typ = GenericClassInstanceType
+        elif isinstance(base, AliasType):
+            typ = GenericAliasInstanceType
+        elif isinstance(base, EnumType):
+            typ = GenericEnumInstanceType
+        else:
+            # fallback, shouldn't happen
+            typ = GenericStructInstanceType
+        return typ(
             base.name, tuple(type_args), typedef=base.typedef, parser=self.parser
         )
 
-    @v_args(inline=True)
-    def primitive_nil(self) -> PrimitiveType:
-        return NilType()
+    def primitive_type(self, children: list[Token]) -> PrimitiveType:
+        return _PRIMITIVES[children[0].value]
 
-    @v_args(inline=True)
-    def primitive_any(self) -> PrimitiveType:
-        return AnyType()
 
-    @v_args(inline=True)
-    def primitive_unknown(self) -> PrimitiveType:
-        return UnknownType()
-
-    @v_args(inline=True)
-    def primitive_self(self) -> PrimitiveType:
-        return PrimitiveType("self")
-
-    @v_args(inline=True)
-    def primitive_boolean(self) -> PrimitiveType:
-        return BooleanType()
-
-    @v_args(inline=True)
-    def primitive_string(self) -> PrimitiveType:
-        return StringType()
+class TypeParser(Lark):
+    """
+    Lark parser that memoizes hydrated types by their type string.
+    The same strings (``string``, ``integer?``, class names in bases etc.)
+    are parsed over and over. Hydrated types are immutable,
+    so they can be shared.
+    Plain and optional primitives, the most common type strings,
+    are looked up directly without running the parser.
+    """
 
-    @v_args(inline=True)
-    def primitive_number(self) -> PrimitiveType:
-        return NumberType()
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._parsed: dict[str, ResolvedType] = {}
 
-    @v_args(inline=True)
-    def primitive_integer(self) -> PrimitiveType:
-        return IntegerType()
+    def parse(self, text: str, start=None, on_error=None):
+        if start is not None or on_error is not None:
+            return super().parse(text, start=start, on_error=on_error)
+        try:
+            return self._parsed[text]
+        except KeyError:
+            pass
+        stripped = text.strip()
+        if (res := _PRIMITIVES.get(stripped)) is None:
+            if stripped.endswith("?") and (inner := _PRIMITIVES.get(stripped[:-1])):
+                res = OptionalType(inner, parser=self)
+            else:
+                res = super().parse(text)
+        self._parsed[text] = res
+        return res
 
-    @v_args(inline=True)
-    def primitive_function(self) -> PrimitiveType:
-        return PrimitiveType("function")
 
-    @v_args(inline=True)
-    def primitive_thread(self) -> PrimitiveType:
-        return PrimitiveType("thread")
+def build_parser(index: Index, *, debug: bool = False, cache: bool = True) -> Lark:
+    """
+    Build a parser that hydrates emmylua_doc_cli type strings into ``ResolvedType`` objects.
 
-    @v_args(inline=True)
-    def primitive_userdata(self) -> PrimitiveType:
-        return PrimitiveType("userdata")
+    Args:
+        index: emmylua_doc_cli output to resolve named types against
+        debug: Enable Lark's debug mode, which logs grammar conflicts
+        cache: Cache the analyzed grammar on disk. Building the LALR tables
+               is the most expensive part of creating the parser.
 
-    @v_args(inline=True)
-    def primitive_lightuserdata(self) -> PrimitiveType:
-        return PrimitiveType("lightuserdata")
+    Returns:
+        Memoizing Lark parser with a ``TreeHydrator`` attached
+    """
+    cache_path = None
+    if cache:
+        # Lark verifies the grammar/options hash stored inside the cache file as well,
+        # the name is just a cheap way to tell whether it is current.
+        key = f"{TYPE_GRAMMAR}{lark.__version__}{sys.version_info[:2]}"
+        grammar_hash = hashlib.sha256(key.encode()).hexdigest()[:16]
+        cache_file = cache_dir() / f"type_grammar_{grammar_hash}.lark"
+        if not cache_file.exists():
+            # Lark is about to write a new cache file, drop the ones left behind
+            # by previous grammar, Lark or Python versions.
+            try:
+                for stale in cache_file.parent.glob("type_grammar_*.lark"):
+                    stale.unlink(missing_ok=True)
+            except OSError:
+                pass
+        cache_path = str(cache_file)
+    transformer = TreeHydrator(index)
+    parser = TypeParser(
+        TYPE_GRAMMAR,
+        parser="lalr",
+        debug=debug,
+        cache=cache_path,
+        transformer=transformer,
+    )
+    transformer.parser = parser  # cringe: ignore o:]
+    return parser
@@ -3,7 +3,7 @@ from pathlib import Path
 import pytest
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def files() -> Path:
     files_dir = Path(__file__).parent / "files"
     return files_dir.resolve()
@@ -2,46 +2,63 @@ from textwrap import dedent
 
 import pytest
 
-from emmylua_render.jinja import render_template_str
+from emmylua_render.jinja import JinjaRenderer
 
 
-def render(md) -> str:
-    return render_template_str("{{ md | vimdoc }}", {"md": md})
+@pytest.fixture(scope="session")
+def renderer(tmp_path_factory):
+    # The renderer caches the compiled template, share it between all tests.
+    # Keep its bytecode cache out of the user's cache directory.
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("XDG_CACHE_HOME", str(tmp_path_factory.mktemp("cache")))
+        return JinjaRenderer(None, fmt="vimdoc")
+
+
+@pytest.fixture
+def render(renderer):
+    def _render(md) -> str:
+        return renderer.render_str("{{ md | vimdoc }}", {"md": md})
+
+    return _render
+
+
+def within_width(text: str, width: int = 78) -> bool:
+    return max(map(len, text.splitlines()), default=0) <= width
 
 
 @pytest.mark.parametrize("level", range(1, 6))
-def test_heading(level):
+def test_heading(level, render):
     text = f"{'#' * level} OK, hi!"
     rendered = render(text)
     assert rendered == "OK, hi! ~\n"
 
 
-def test_para():
+def test_para(render):
     text = "Let's try this with a regular Markdown document. Maybe this allows me to see the elements as they arrive. Does wrapping work here? Probably not - now it does."
     rendered = render(text)
     assert rendered.replace("\n", " ").replace("’", "'").strip() == text
-    assert all(len(line) <= 78 for line in rendered.splitlines())
+    assert within_width(rendered)
 
 
-def test_link():
+def test_link(render):
     text = "[some description](#link-target)"
     rendered = render(text)
     assert rendered == "some description |link-target|\n"
 
 
-def test_vimhelp_link():
+def test_vimhelp_link(render):
     text = "`:h foobar`"
     rendered = render(text)
     assert rendered == "|foobar|\n"
 
 
-def test_vimhelp_opt():
+def test_vimhelp_opt(render):
     text = "`'foobar'`"
     rendered = render(text)
     assert rendered == "'foobar'\n"
 
 
-def test_deflist():
+def test_deflist(render):
     text = dedent(
         """
         def_term
@@ -69,11 +86,11 @@ def test_deflist():
         """
     ).lstrip()
     rendered = render(text)
-    assert all(len(line) <= 78 for line in rendered.splitlines())
+    assert within_width(rendered)
     assert rendered == expected
 
 
-def test_code_block():
+def test_code_block(render):
     text = dedent(
         """
         Example:
@@ -96,20 +113,20 @@ def test_code_block():
     assert rendered == expected
 
 
-def test_heavy_em():
+def test_heavy_em(render):
     text = "**Foobar**"
     rend = render(text)
     assert rend == "{Foobar}\n"
 
 
-def test_em():
+def test_em(render):
     text = "*Foobar*"
     rend = render(text)
     assert rend == "_Foobar_\n"
 
 
 @pytest.mark.parametrize("style", ("*", "-"))
-def test_flat_unordered_list(style):
+def test_flat_unordered_list(style, render):
     text = dedent(
         """
         {style} foo is **bold**
@@ -142,7 +159,7 @@ def test_flat_unordered_list(style):
     assert rend == expected
 
 
-def test_flat_ordered_list():
+def test_flat_ordered_list(render):
     text = dedent(
         """
         1. See vim help: `:h marks`
@@ -197,7 +214,7 @@ def test_flat_ordered_list():
     assert rend == expected
 
 
-def test_nested_unordered_list():
+def test_nested_unordered_list(render):
     text = dedent(
         """
         - Note the following stuff:
@@ -236,7 +253,7 @@ def test_nested_unordered_list():
     assert rend == expected
 
 
-def test_nested_ordered_list():
+def test_nested_ordered_list(render):
     text = dedent(
         """
         1. Not this:
@@ -265,7 +282,7 @@ def test_nested_ordered_list():
     assert rend == expected
 
 
-def test_nested_mixed_list():
+def test_nested_mixed_list(render):
     text = dedent(
         """
         1. Not this:
@@ -312,7 +329,7 @@ def test_nested_mixed_list():
     assert rend == expected
 
 
-def test_lineblock():
+def test_lineblock(render):
     text = dedent(
         """
         | Now try a lineblock
@@ -322,7 +339,7 @@ def test_lineblock():
     assert render(text) == text.lstrip()
 
 
-def test_table():
+def test_table(render):
     text = dedent(
         """
           Right     Left     Center     Default
@@ -342,7 +359,7 @@ def test_table():
     assert render(text) == expected
 
 
-def test_blockquote():
+def test_blockquote(render):
     text = dedent(
         """
         > Now do whatever this is
@@ -0,0 +1,70 @@
+from pathlib import Path
+
+import pytest
+
+from emmylua_render.jinja import extract_lines
+
+SOURCE = """\
+local M = {}
+
+local function dump_table(tbl)
+  local res = {}
+  for k, v in pairs(tbl) do
+    res[#res + 1] = k .. "=" .. tostring(v)
+  end
+  return res
+end
+
+return M
+"""
+
+
+@pytest.fixture
+def source(tmp_path: Path) -> Path:
+    path = tmp_path / "source.lua"
+    path.write_text(SOURCE)
+    return path
+
+
+@pytest.mark.parametrize(
+    "kwargs,expected",
+    (
+        ({}, SOURCE.rstrip("\n")),
+        (
+            {"start": r"^local function", "stop": "^end$"},
+            "\n".join(SOURCE.splitlines()[2:9]),
+        ),
+        (
+            {"start": r"^local function", "stop": "^end$", "skip_start": 1},
+            "\n".join(SOURCE.splitlines()[3:9]),
+        ),
+        (
+            {"start": r"^local function", "stop": "^end$", "skip_end": 1},
+            "\n".join(SOURCE.splitlines()[2:8]),
+        ),
+        ({"start": "^return", "skip_start": 5}, "return M"),
+        ({"start": "^nothing"}, ""),
+        (
+            {"start": r"^local function", "stop": "^end$", "include": r"^\s+res"},
+            '    res[#res + 1] = k .. "=" .. tostring(v)',
+        ),
+        (
+            {"start": r"^local function", "stop": "^end$", "exclude": r"^\s"},
+            "local function dump_table(tbl)\nend",
+        ),
+    ),
+)
+def test_extract_lines(source: Path, kwargs, expected):
+    assert extract_lines(source, **kwargs) == expected
+
+
+def test_extract_lines_crlf(tmp_path: Path):
+    path = tmp_path / "source.lua"
+    path.write_bytes(SOURCE.replace("\n", "\r\n").encode())
+    assert extract_lines(path, start="^return") == "return M"
+
+
+def test_extract_lines_empty(tmp_path: Path):
+    path = tmp_path / "source.lua"
+    path.touch()
+    assert extract_lines(path, stop="^end$") == ""
@@ -1,18 +1,19 @@
 import logging
+import os
 from pathlib import Path
 
 import pytest
 from lark import Lark
 from lark import logger as lark_logger
 
-from emmylua_render.raw_models import Index
+from emmylua_render.raw_models import FieldMember, Index
 from emmylua_render.type_parser import (
-    TYPE_GRAMMAR,
     AliasType,
     AnyType,
     ArrayType,
     BooleanType,
     ClassType,
+    DocumentedField,
     FunctionType,
     GenericAliasInstanceType,
     GenericStructInstanceType,
@@ -29,369 +30,471 @@ from emmylua_render.type_parser import (
     StringType,
     StructType,
     TableType,
-    TreeHydrator,
     TupleType,
     UnionType,
     UnknownType,
     VariadicType,
+    build_parser,
 )
 
 
-@pytest.fixture
-def parser(files: Path) -> Lark:
-    lark_logger.setLevel(logging.DEBUG)
-    docs = Index.model_validate_json((files / "doc.json").read_text())
-    transformer = TreeHydrator(docs)
-    parser = Lark(TYPE_GRAMMAR, parser="lalr", debug=True, transformer=transformer)
-    transformer.parser = parser
-    return parser
+@pytest.fixture(scope="session")
+def parser(files: Path, request: pytest.FixtureRequest) -> Lark:
+    # Set to log grammar conflicts while building the parser
+    debug = bool(os.environ.get("EMMYLUA_LARK_DEBUG"))
+    if debug:
+        lark_logger.setLevel(logging.DEBUG)
+    docs = Index.model_validate_json((files / "doc.json").read_bytes())
+    # Loads the analyzed grammar from the on-disk cache on subsequent runs.
+    # Keep it in pytest's cache instead of the user's cache directory.
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("XDG_CACHE_HOME", str(request.config.cache.mkdir("emmylua-render")))
+        return build_parser(docs, debug=debug)
 
 
-@pytest.mark.parametrize(
-    "ts,typ",
+def _check_name(parsed, t):
+    assert parsed.name == t[1]
+    return ()
+
+
+def _check_value(parsed, t):
+    assert parsed.value == t[1]
+    return ()
+
+
+def _check_generic(parsed, t):
+    assert parsed.name == t[1]
+    typeargs = t[2] if len(t) > 2 else ()
+    return [(parsed.type_args[i], typearg) for i, typearg in enumerate(typeargs)]
+
+
+def _check_omitted(parsed, t):
+    omitted = t[2] if len(t) > 2 else False
+    assert parsed.omitted is omitted
+
+
+def _check_elements(parsed, t):
+    if t[0] is not TupleType:
+        _check_omitted(parsed, t)
+    return [(parsed.elements[i], el) for i, el in enumerate(t[1])]
+
+
+def _check_table(parsed, t):
+    children = []
+    for k, v in t[1]:
+        checked = False
+        try:
+            if issubclass(k, ResolvedType):
+                for res_k, res_v in parsed.fields.items():
+                    if isinstance(res_k, k):
+                        children.append((res_v, v))
+                        checked = True
+                        break
+                else:
+                    pytest.fail(f"Missing table key type {k}")
+        except TypeError:
+            pass
+        if not checked:
+            children.append((parsed.fields[k], v))
+    _check_omitted(parsed, t)
+    return children
+
+
+def _check_function(parsed, t):
+    children = []
+    for i, (pname, ptyp) in enumerate(t[1]):
+        assert parsed.params[i][0] == pname
+        children.append((parsed.params[i][1], ptyp))
+    if len(t) > 2:
+        children.append((parsed.rets, t[2]))
+    else:
+        assert parsed.rets is None
+    return children
+
+
+# Types whose bare parse results are exactly this class (not a subclass or
+# wrapper), so the class can be compared directly
+_FINAL = frozenset(
+    (
+        NilType,
+        AnyType,
+        UnknownType,
+        BooleanType,
+        IntegerType,
+        NumberType,
+        StringType,
+        LiteralBool,
+        LiteralInt,
+        LiteralStr,
+    )
+)
+
+# Checks for expected ``(type class, inner, ...)`` tuples in ``test_parser``.
+# They return pairs of nested parsed and expected types to check next.
+_CHECKS = {
+    PrimitiveType: _check_name,
+    LiteralBool: _check_value,
+    LiteralInt: _check_value,
+    LiteralStr: _check_value,
+    StructType: _check_name,
+    ClassType: _check_name,
+    AliasType: _check_name,
+    GenericStructInstanceType: _check_generic,
+    GenericAliasInstanceType: _check_generic,
+    OptionalType: lambda parsed, t: [(parsed.inner, t[1])],
+    VariadicType: lambda parsed, t: [(parsed.element_type, t[1])],
+    ArrayType: lambda parsed, t: [(parsed.element_type, t[1])],
+    TupleType: _check_elements,
+    UnionType: _check_elements,
+    IntersectionType: _check_elements,
+    TableType: _check_table,
+    FunctionType: _check_function,
+}
+
+
+# Type strings and their expected types, see ``assert_typ`` in ``test_parser``
+_CASES = (
+    ("nil", NilType),
+    ("any", AnyType),
+    ("unknown", UnknownType),
+    ("self", (PrimitiveType, "self")),
+    ("function", (PrimitiveType, "function")),
+    ("thread", (PrimitiveType, "thread")),
+    ("userdata", (PrimitiveType, "userdata")),
+    ("lightuserdata", (PrimitiveType, "lightuserdata")),
+    ("boolean", BooleanType),
+    ("integer", IntegerType),
+    ("number", NumberType),
+    ("string", StringType),
+    ("1", (LiteralInt, 1)),
+    ("12", (LiteralInt, 12)),
+    ('"bar"', (LiteralStr, "bar")),
+    # ("'foo'", LiteralStr), Fails parsing, but is not output by emmylua_doc_cli
+    ("true", (LiteralBool, True)),
+    ("false", (LiteralBool, False)),
+    ("{}", TableType),
+    ("table", (StructType, "table")),
+    ("integer?", (OptionalType, IntegerType)),
+    ("string[]", (ArrayType, StringType)),
+    ("(string)", (TupleType, (StringType,))),
+    ("(1,2,3)", (TupleType, (LiteralInt, LiteralInt, LiteralInt))),
     (
-        ("nil", NilType),
-        ("any", AnyType),
-        ("unknown", UnknownType),
-        ("self", (PrimitiveType, "self")),
-        ("function", (PrimitiveType, "function")),
-        ("thread", (PrimitiveType, "thread")),
-        ("userdata", (PrimitiveType, "userdata")),
-        ("lightuserdata", (PrimitiveType, "lightuserdata")),
-        ("boolean", BooleanType),
-        ("integer", IntegerType),
-        ("number", NumberType),
-        ("string", StringType),
-        ("1", (LiteralInt, 1)),
-        ("12", (LiteralInt, 12)),
-        ('"bar"', (LiteralStr, "bar")),
-        # ("'foo'", LiteralStr), Fails parsing, but is not output by emmylua_doc_cli
-        ("true", (LiteralBool, True)),
-        ("false", (LiteralBool, False)),
-        ("{}", TableType),
-        ("table", (StructType, "table")),
-        ("integer?", (OptionalType, IntegerType)),
-        ("string[]", (ArrayType, StringType)),
-        ("(string)", (TupleType, (StringType,))),
-        ("(1,2,3)", (TupleType, (LiteralInt, LiteralInt, LiteralInt))),
+        "(0|3|2|1|4)",
         (
-            "(0|3|2|1|4)",
+            UnionType,
             (
-                UnionType,
-                (
-                    LiteralInt,
-                    LiteralInt,
-                    LiteralInt,
-                    LiteralInt,
-                    LiteralInt,
-                ),
+                LiteralInt,
+                LiteralInt,
+                LiteralInt,
+                LiteralInt,
+                LiteralInt,
             ),
         ),
-        # ('("a"|"b")|number', None), This fails parsing, but emmylua_doc_cli does not output it
-        ("(string,any ...)", (TupleType, (StringType, (VariadicType, AnyType)))),
+    ),
+    # ('("a"|"b")|number', None), This fails parsing, but emmylua_doc_cli does not output it
+    ("(string,any ...)", (TupleType, (StringType, (VariadicType, AnyType)))),
+    (
+        "(9|4|6|2|11|7...)",
         (
-            "(9|4|6|2|11|7...)",
+            UnionType,
             (
-                UnionType,
-                (
-                    LiteralInt,
-                    LiteralInt,
-                    LiteralInt,
-                    LiteralInt,
-                    LiteralInt,
-                    LiteralInt,
-                ),
-                True,
+                LiteralInt,
+                LiteralInt,
+                LiteralInt,
+                LiteralInt,
+                LiteralInt,
+                LiteralInt,
             ),
+            True,
         ),
-        ("{ [string]: any }", (TableType, ((StringType, AnyType),))),
-        ("(string | number)", (UnionType, (StringType, NumberType))),
+    ),
+    ("{ [string]: any }", (TableType, ((StringType, AnyType),))),
+    ("(string | number)", (UnionType, (StringType, NumberType))),
+    (
+        "(integer[]?, string?)",
         (
-            "(integer[]?, string?)",
-            (
-                TupleType,
-                ((OptionalType, (ArrayType, IntegerType)), (OptionalType, StringType)),
-            ),
+            TupleType,
+            ((OptionalType, (ArrayType, IntegerType)), (OptionalType, StringType)),
         ),
-        ('("block"|"line"|"char")', (UnionType, (LiteralStr, LiteralStr, LiteralStr))),
+    ),
+    ('("block"|"line"|"char")', (UnionType, (LiteralStr, LiteralStr, LiteralStr))),
+    (
+        "fun(a: integer) -> integer[]?",
         (
-            "fun(a: integer) -> integer[]?",
-            (
-                FunctionType,
-                (("a", IntegerType),),
-                (OptionalType, (ArrayType, IntegerType)),
-            ),
+            FunctionType,
+            (("a", IntegerType),),
+            (OptionalType, (ArrayType, IntegerType)),
         ),
+    ),
+    (
+        "(RawType,integer,integer,DataType)",
         (
-            "(RawType,integer,integer,DataType)",
+            TupleType,
             (
-                TupleType,
-                (
-                    (StructType, "RawType"),
-                    IntegerType,
-                    IntegerType,
-                    (StructType, "DataType"),
-                ),
+                (StructType, "RawType"),
+                IntegerType,
+                IntegerType,
+                (StructType, "DataType"),
             ),
         ),
+    ),
+    (
+        "fun() -> (string, number, boolean?)",
         (
-            "fun() -> (string, number, boolean?)",
-            (
-                FunctionType,
-                (),
-                (TupleType, (StringType, NumberType, (OptionalType, BooleanType))),
-            ),
+            FunctionType,
+            (),
+            (TupleType, (StringType, NumberType, (OptionalType, BooleanType))),
         ),
+    ),
+    (
+        "fun(continuity.core.IdleSession, ...)",
         (
-            "fun(continuity.core.IdleSession, ...)",
+            FunctionType,
             (
-                FunctionType,
                 (
-                    (
-                        (None, (ClassType, "continuity.core.IdleSession")),
-                        (None, (VariadicType, AnyType)),
-                    )
-                ),
+                    (None, (ClassType, "continuity.core.IdleSession")),
+                    (None, (VariadicType, AnyType)),
+                )
             ),
         ),
+    ),
+    (
+        "fun(session: continuity.core.IdleSession)",
+        (FunctionType, (("session", (ClassType, "continuity.core.IdleSession")),)),
+    ),
+    (
+        "{ is_headless: boolean, is_pager: boolean }",
+        (TableType, (("is_headless", BooleanType), ("is_pager", BooleanType))),
+    ),
+    (
+        "continuity.util.shada.EntryData.BufferList.Item[]",
+        (ArrayType, (ClassType, "continuity.util.shada.EntryData.BufferList.Item")),
+    ),
+    (
+        "(continuity.core.Session.DetachReasonBuiltin|string)",
+        (UnionType, (AliasType, StringType)),
+    ),
+    # FIXME: AFAICT, at least EmmyLua 0.16 dumps
+    #        (fun(a: integer, b: string): integer[]?, string?)[]
+    #        as
+    #        fun(a: integer, b: string) -> (integer[]?, string?)[]
+    #        and does not interpret it as a list of functions.
+    (
+        "fun(a: integer, b: string) -> (integer[]?, string?)[]",
         (
-            "fun(session: continuity.core.IdleSession)",
-            (FunctionType, (("session", (ClassType, "continuity.core.IdleSession")),)),
-        ),
-        (
-            "{ is_headless: boolean, is_pager: boolean }",
-            (TableType, (("is_headless", BooleanType), ("is_pager", BooleanType))),
-        ),
-        (
-            "continuity.util.shada.EntryData.BufferList.Item[]",
-            (ArrayType, (ClassType, "continuity.util.shada.EntryData.BufferList.Item")),
-        ),
-        (
-            "(continuity.core.Session.DetachReasonBuiltin|string)",
-            (UnionType, (AliasType, StringType)),
-        ),
-        # FIXME: AFAICT, at least EmmyLua 0.16 dumps
-        #        (fun(a: integer, b: string): integer[]?, string?)[]
-        #        as
-        #        fun(a: integer, b: string) -> (integer[]?, string?)[]
-        #        and does not interpret it as a list of functions.
-        (
-            "fun(a: integer, b: string) -> (integer[]?, string?)[]",
+            FunctionType,
+            (("a", IntegerType), ("b", StringType)),
             (
-                FunctionType,
-                (("a", IntegerType), ("b", StringType)),
+                ArrayType,
                 (
-                    ArrayType,
+                    TupleType,
                     (
-                        TupleType,
-                        (
-                            (OptionalType, (ArrayType, IntegerType)),
-                            (OptionalType, StringType),
-                        ),
+                        (OptionalType, (ArrayType, IntegerType)),
+                        (OptionalType, StringType),
                     ),
                 ),
             ),
         ),
+    ),
+    (
+        "(fun(a: integer, b: string) -> (integer[]?,string?))?",
         (
-            "(fun(a: integer, b: string) -> (integer[]?,string?))?",
+            OptionalType,
             (
-                OptionalType,
+                FunctionType,
+                (("a", IntegerType), ("b", StringType)),
                 (
-                    FunctionType,
-                    (("a", IntegerType), ("b", StringType)),
+                    TupleType,
                     (
-                        TupleType,
-                        (
-                            (OptionalType, (ArrayType, IntegerType)),
-                            (OptionalType, StringType),
-                        ),
+                        (OptionalType, (ArrayType, IntegerType)),
+                        (OptionalType, StringType),
                     ),
                 ),
             ),
         ),
+    ),
+    (
+        "fun(name: string, opts: continuity.core.ext.HookOpts)[]",
         (
-            "fun(name: string, opts: continuity.core.ext.HookOpts)[]",
+            ArrayType,
             (
-                ArrayType,
+                FunctionType,
                 (
-                    FunctionType,
-                    (
-                        ("name", StringType),
-                        ("opts", (AliasType, "continuity.core.ext.HookOpts")),
-                    ),
+                    ("name", StringType),
+                    ("opts", (AliasType, "continuity.core.ext.HookOpts")),
                 ),
             ),
         ),
+    ),
+    (
+        "(continuity.SideEffects.Reset & continuity.SideEffects.Save)",
         (
-            "(continuity.SideEffects.Reset & continuity.SideEffects.Save)",
+            IntersectionType,
             (
-                IntersectionType,
-                (
-                    (ClassType, "continuity.SideEffects.Reset"),
-                    (ClassType, "continuity.SideEffects.Save"),
-                ),
+                (ClassType, "continuity.SideEffects.Reset"),
+                (ClassType, "continuity.SideEffects.Save"),
             ),
         ),
+    ),
+    (
+        "(continuity.core.ext.Hook.Save|continuity.core.ext.Hook.Load)",
         (
-            "(continuity.core.ext.Hook.Save|continuity.core.ext.Hook.Load)",
+            UnionType,
             (
-                UnionType,
-                (
-                    (AliasType, "continuity.core.ext.Hook.Save"),
-                    (AliasType, "continuity.core.ext.Hook.Load"),
-                ),
+                (AliasType, "continuity.core.ext.Hook.Save"),
+                (AliasType, "continuity.core.ext.Hook.Load"),
             ),
         ),
+    ),
+    (
+        "(continuity.util.TryLog.Format & continuity.util.TryLog.Params)",
         (
-            "(continuity.util.TryLog.Format & continuity.util.TryLog.Params)",
+            IntersectionType,
             (
-                IntersectionType,
-                (
-                    (AliasType, "continuity.util.TryLog.Format"),
-                    (ClassType, "continuity.util.TryLog.Params"),
-                ),
+                (AliasType, "continuity.util.TryLog.Format"),
+                (ClassType, "continuity.util.TryLog.Params"),
             ),
         ),
+    ),
+    (
+        "continuity.util.shada.ShadaEntry<5,continuity.util.shada.EntryData.Register>",
         (
-            "continuity.util.shada.ShadaEntry<5,continuity.util.shada.EntryData.Register>",
+            GenericAliasInstanceType,
+            "continuity.util.shada.ShadaEntry",
             (
-                GenericAliasInstanceType,
-                "continuity.util.shada.ShadaEntry",
-                (
-                    (LiteralInt, 5),
-                    (ClassType, "continuity.util.shada.EntryData.Register"),
-                ),
+                (LiteralInt, 5),
+                (ClassType, "continuity.util.shada.EntryData.Register"),
             ),
         ),
+    ),
+    (
+        "continuity.util.shada.ShadaEntry<11,continuity.util.shada.EntryData.Change>",
         (
-            "continuity.util.shada.ShadaEntry<11,continuity.util.shada.EntryData.Change>",
+            GenericAliasInstanceType,
+            "continuity.util.shada.ShadaEntry",
             (
-                GenericAliasInstanceType,
-                "continuity.util.shada.ShadaEntry",
-                (
-                    (LiteralInt, 11),
-                    (ClassType, "continuity.util.shada.EntryData.Change"),
-                ),
+                (LiteralInt, 11),
+                (ClassType, "continuity.util.shada.EntryData.Change"),
             ),
         ),
+    ),
+    (
+        "(fun(ctx: { is_headless: boolean, is_pager: boolean }) -> (string|false))?",
         (
-            "(fun(ctx: { is_headless: boolean, is_pager: boolean }) -> (string|false))?",
+            OptionalType,
             (
-                OptionalType,
+                FunctionType,
                 (
-                    FunctionType,
                     (
+                        "ctx",
                         (
-                            "ctx",
+                            TableType,
                             (
-                                TableType,
-                                (
-                                    ("is_headless", BooleanType),
-                                    ("is_pager", BooleanType),
-                                ),
+                                ("is_headless", BooleanType),
+                                ("is_pager", BooleanType),
                             ),
                         ),
                     ),
-                    (UnionType, (StringType, (LiteralBool, False))),
                 ),
+                (UnionType, (StringType, (LiteralBool, False))),
             ),
         ),
+    ),
+    (
+        "(fun(a: integer, b: string) -> (integer[]?,string?)|continuity.SideEffects.Save)",
         (
-            "(fun(a: integer, b: string) -> (integer[]?,string?)|continuity.SideEffects.Save)",
+            UnionType,
             (
-                UnionType,
                 (
+                    FunctionType,
+                    (("a", IntegerType), ("b", StringType)),
                     (
-                        FunctionType,
-                        (("a", IntegerType), ("b", StringType)),
+                        TupleType,
                         (
-                            TupleType,
-                            (
-                                (OptionalType, (ArrayType, IntegerType)),
-                                (OptionalType, StringType),
-                            ),
+                            (OptionalType, (ArrayType, IntegerType)),
+                            (OptionalType, StringType),
                         ),
                     ),
-                    (ClassType, "continuity.SideEffects.Save"),
                 ),
+                (ClassType, "continuity.SideEffects.Save"),
             ),
         ),
+    ),
+    (
+        '("buffer_list"|"global_mark"|"local_mark"|"search_pattern"|"variable"|"register"...)',
         (
-            '("buffer_list"|"global_mark"|"local_mark"|"search_pattern"|"variable"|"register"...)',
+            UnionType,
             (
-                UnionType,
-                (
-                    (LiteralStr, "buffer_list"),
-                    (LiteralStr, "global_mark"),
-                    (LiteralStr, "local_mark"),
-                    (LiteralStr, "search_pattern"),
-                    (LiteralStr, "variable"),
-                    (LiteralStr, "register"),
-                ),
-                True,
+                (LiteralStr, "buffer_list"),
+                (LiteralStr, "global_mark"),
+                (LiteralStr, "local_mark"),
+                (LiteralStr, "search_pattern"),
+                (LiteralStr, "variable"),
+                (LiteralStr, "register"),
             ),
+            True,
         ),
+    ),
+    (
+        "fun(name: string, opts: continuity.core.ext.HookOpts, target_tabpage: continuity.core.TabID?)[]",
         (
-            "fun(name: string, opts: continuity.core.ext.HookOpts, target_tabpage: continuity.core.TabID?)[]",
+            ArrayType,
             (
-                ArrayType,
+                FunctionType,
                 (
-                    FunctionType,
+                    ("name", StringType),
+                    ("opts", (AliasType, "continuity.core.ext.HookOpts")),
                     (
-                        ("name", StringType),
-                        ("opts", (AliasType, "continuity.core.ext.HookOpts")),
-                        (
-                            "target_tabpage",
-                            (OptionalType, (AliasType, "continuity.core.TabID")),
-                        ),
+                        "target_tabpage",
+                        (OptionalType, (AliasType, "continuity.core.TabID")),
                     ),
                 ),
             ),
         ),
+    ),
+    (
+        "((continuity.SideEffects.Save & continuity.SideEffects.SilenceErrors)|continuity.SideEffects.Attach)",
         (
-            "((continuity.SideEffects.Save & continuity.SideEffects.SilenceErrors)|continuity.SideEffects.Attach)",
+            UnionType,
             (
-                UnionType,
                 (
+                    IntersectionType,
                     (
-                        IntersectionType,
-                        (
-                            (ClassType, "continuity.SideEffects.Save"),
-                            (ClassType, "continuity.SideEffects.SilenceErrors"),
-                        ),
+                        (ClassType, "continuity.SideEffects.Save"),
+                        (ClassType, "continuity.SideEffects.SilenceErrors"),
                     ),
-                    (ClassType, "continuity.SideEffects.Attach"),
                 ),
+                (ClassType, "continuity.SideEffects.Attach"),
             ),
         ),
+    ),
+    (
+        "fun(session: continuity.core.ActiveSession, reason: continuity.core.Session.DetachReason, opts: (continuity.core.Session.DetachOpts & continuity.core.PassthroughOpts)) -> std.Nullable<(continuity.core.Session.DetachOpts & continuity.core.PassthroughOpts)>",
         (
-            "fun(session: continuity.core.ActiveSession, reason: continuity.core.Session.DetachReason, opts: (continuity.core.Session.DetachOpts & continuity.core.PassthroughOpts)) -> std.Nullable<(continuity.core.Session.DetachOpts & continuity.core.PassthroughOpts)>",
+            FunctionType,
             (
-                FunctionType,
+                ("session", (ClassType, "continuity.core.ActiveSession")),
+                ("reason", (AliasType, "continuity.core.Session.DetachReason")),
                 (
-                    ("session", (ClassType, "continuity.core.ActiveSession")),
-                    ("reason", (AliasType, "continuity.core.Session.DetachReason")),
+                    "opts",
                     (
-                        "opts",
+                        IntersectionType,
                         (
-                            IntersectionType,
-                            (
-                                (ClassType, "continuity.core.Session.DetachOpts"),
-                                (AliasType, "continuity.core.PassthroughOpts"),
-                            ),
+                            (ClassType, "continuity.core.Session.DetachOpts"),
+                            (AliasType, "continuity.core.PassthroughOpts"),
                         ),
                     ),
                 ),
+            ),
+            (
+                GenericStructInstanceType,
+                "std.Nullable",
                 (
-                    GenericStructInstanceType,
-                    "std.Nullable",
                     (
+                        IntersectionType,
                         (
-                            IntersectionType,
-                            (
-                                (ClassType, "continuity.core.Session.DetachOpts"),
-                                (AliasType, "continuity.core.PassthroughOpts"),
-                            ),
+                            (ClassType, "continuity.core.Session.DetachOpts"),
+                            (AliasType, "continuity.core.PassthroughOpts"),
                         ),
                     ),
                 ),
@@ -399,89 +502,71 @@ def parser(files: Path) -> Lark:
         ),
     ),
 )
+
+
+@pytest.mark.parametrize("ts,typ", _CASES, ids=[ts for ts, _ in _CASES])
 def test_parser(parser: Lark, ts: str, typ):
-    def assert_typ(parsed, t):
-        if isinstance(t, tuple):
+    def assert_typ(root_parsed, root_t):
+        # Nested types are checked via a worklist instead of recursion
+        stack = [(root_parsed, root_t)]
+        while stack:
+            parsed, t = stack.pop()
+            if not isinstance(t, tuple):
+                assert type(parsed) is t if t in _FINAL else isinstance(parsed, t)
+                continue
             outer = t[0]
-            assert isinstance(parsed, outer)
-            inner = t[1]
-            if outer is PrimitiveType:
-                assert parsed.name == inner
-            elif outer.__name__.startswith("Literal"):
-                assert parsed.value == inner
-            elif outer is StructType or outer is ClassType or outer is AliasType:
-                assert parsed.name == inner
-            elif (
-                outer is GenericStructInstanceType or outer is GenericAliasInstanceType
-            ):
-                assert parsed.name == inner
-                try:
-                    typeargs = t[2]
-                except IndexError:
-                    typeargs = []
-                for i, typearg in enumerate(typeargs):
-                    assert_typ(parsed.type_args[i], typearg)
-            elif outer is OptionalType:
-                assert_typ(parsed.inner, inner)
-            elif outer is VariadicType:
-                assert_typ(parsed.element_type, inner)
-            elif outer is ArrayType:
-                assert_typ(parsed.element_type, inner)
-            elif outer is TupleType or outer is UnionType or outer is IntersectionType:
-                for i, el in enumerate(inner):
-                    assert_typ(parsed.elements[i], el)
-                if outer is not TupleType:
-                    try:
-                        omitted = t[2]
-                    except IndexError:
-                        omitted = False
-                    assert parsed.omitted is omitted
-            elif outer is TableType:
-                for k, v in inner:
-                    checked = False
-                    try:
-                        if issubclass(k, ResolvedType):
-                            for res_k, res_v in parsed.fields.items():
-                                if isinstance(res_k, k):
-                                    assert_typ(res_v, v)
-                                    checked = True
-                                    break
-                            else:
-                                pytest.fail(f"Missing table key type {k}")
-                    except TypeError:
-                        pass
-                    if not checked:
-                        assert_typ(parsed.fields[k], v)
-                try:
-                    omitted = t[2]
-                except IndexError:
-                    omitted = False
-                assert parsed.omitted is omitted
-            elif outer is FunctionType:
-                for i, (pname, ptyp) in enumerate(inner):
-                    assert parsed.params[i][0] == pname
-                    assert_typ(parsed.params[i][1], ptyp)
-                try:
-                    rets = t[2]
-                except IndexError:
-                    assert parsed.rets is None
-                else:
-                    assert_typ(parsed.rets, rets)
+            if outer in _FINAL:
+                assert type(parsed) is outer
             else:
+                assert isinstance(parsed, outer)
+            try:
+                check = _CHECKS[outer]
+            except KeyError:
                 pytest.fail(f"Missing test for type {outer}")
-        else:
-            assert isinstance(parsed, t)
+            stack.extend(check(parsed, t))
 
     res = parser.parse(ts)
     assert res
     assert_typ(res, typ)
     rend = str(res)
-    try:
-        assert rend == ts
-    except AssertionError as err:
-        if not ts.find(" ") and not rend.find(" "):
-            raise
-        try:
-            assert rend.replace(" ", "") == ts.replace(" ", "")
-        except AssertionError:
-            raise err
+    if rend != ts:
+        # Whitespace between elements is not preserved
+        assert rend.replace(" ", "") == ts.replace(" ", ""), f"{rend!r} != {ts!r}"
+
+
+def test_substitute_typevars_table(parser: Lark):
+    res = parser.parse("{ a: T, [T]: string, b: integer }")
+    subst = res.substitute_typevars({"T": parser.parse("boolean")})
+    assert str(subst) == "{ a: boolean, b: integer, [boolean]: string }"
+    # Tables without typevars are returned as-is
+    res = parser.parse("{ a: string, [integer]: boolean }")
+    assert res.substitute_typevars({"T": parser.parse("boolean")}) is res
+
+
+def test_documented_fields_of_same_type_are_distinct(parser: Lark):
+    typ = parser.parse("string")
+    a = DocumentedField(typ, typedef=FieldMember(type="field", name="a", typ="string"))
+    b = DocumentedField(typ, typedef=FieldMember(type="field", name="b", typ="string"))
+    # The synthesized wrapper class is shared, identity must still be kept
+    assert type(a) is type(b)
+    assert a != b
+    assert len({a, b}) == 2
+
+
+@pytest.mark.parametrize(
+    "ts,other",
+    (
+        ("string?", "integer?"),
+        ("string[]", "integer[]"),
+        ("string...", "integer..."),
+        ("continuity.core.ActiveSession?", "continuity.core.IdleSession?"),
+        ("continuity.core.ActiveSession[]", "continuity.core.IdleSession[]"),
+    ),
+)
+def test_wrapper_types_compare_by_value(parser: Lark, ts: str, other: str):
+    # Leading whitespace avoids getting the memoized instance
+    a, b = parser.parse(ts), parser.parse(f" {ts}")
+    assert a is not b
+    assert a == b
+    assert hash(a) == hash(b)
+    assert len({a, b, parser.parse(other)}) == 2